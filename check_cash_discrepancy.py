@@ -3,13 +3,23 @@ Check for cash balance discrepancies in portfolios.
 """
 import os
 import django
+from django.apps import apps
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-django.setup()
+if not apps.ready:  # Already booted when imported by `manage.py diagnose`
+    django.setup()
 
 from decimal import Decimal
+from django.db.models import Case, DecimalField, F, Sum, Value, When
 from zimuabull.models import Portfolio, PortfolioTransaction, TransactionType
 
+ZERO = Decimal("0")
+EPS = Decimal("0.01")  # Discrepancy tolerance
+CENT = Decimal("0.01")
+
+# Date, type, symbol, quantity, price, cash impact
+ROW_FMT = "{} {:<10} {:<8} {:<8} {:<10} {:<15}".format
+
 def check_portfolio_cash_accuracy(portfolio_id=15):
     """Check if portfolio cash balance matches transaction history"""
     portfolio = Portfolio.objects.get(id=portfolio_id)
@@ -19,31 +29,37 @@ def check_portfolio_cash_accuracy(portfolio_id=15):
     print(f"\n{'='*80}\n")
 
     # Calculate what cash should be based on all transactions
-    transactions = PortfolioTransaction.objects.filter(
-        portfolio=portfolio
-    ).order_by('transaction_date', 'created_at')
-
-    calculated_cash = Decimal("0")
+    transactions = PortfolioTransaction.objects.filter(portfolio=portfolio)
+
+    # Let the database compute the cash impact of every transaction in one query
+    cash = transactions.aggregate(
+        cash=Sum(
+            Case(
+                When(transaction_type=TransactionType.DEPOSIT, then=F('amount')),
+                When(transaction_type=TransactionType.WITHDRAWAL, then=-F('amount')),
+                When(transaction_type=TransactionType.BUY, then=-F('quantity') * F('price')),
+                When(transaction_type=TransactionType.SELL, then=F('quantity') * F('price')),
+                default=Value(ZERO),
+                output_field=DecimalField(max_digits=20, decimal_places=6),
+            )
+        )
+    )['cash'] or ZERO
+    # The aggregate carries the expression's 6 decimal places (and SQLite's float noise); report cents
+    calculated_cash = cash.quantize(CENT)
 
     print("Transaction History (most recent 20):")
     print(f"{'Date':<12} {'Type':<10} {'Symbol':<8} {'Qty':<8} {'Price':<10} {'Cash Impact':<15} {'Running Cash':<15}")
     print("-" * 100)
 
-    # Get initial deposits
-    for txn in transactions:
-        if txn.transaction_type == TransactionType.DEPOSIT:
-            calculated_cash += txn.amount
-        elif txn.transaction_type == TransactionType.WITHDRAWAL:
-            calculated_cash -= txn.amount
-        elif txn.transaction_type == TransactionType.BUY:
-            calculated_cash -= (txn.quantity * txn.price)
-        elif txn.transaction_type == TransactionType.SELL:
-            calculated_cash += (txn.quantity * txn.price)
-
     # Show recent transactions
-    recent = list(transactions.order_by('-created_at')[:20])
+    recent = list(
+        transactions.select_related('symbol').order_by('-created_at').only(
+            'transaction_date', 'transaction_type', 'symbol__symbol', 'quantity', 'price', 'amount', 'created_at'
+        )[:20]
+    )
     recent.reverse()
 
+    lines = []
     for txn in recent:
         symbol_str = txn.symbol.symbol if txn.symbol else "N/A"
         qty_str = f"{txn.quantity}" if txn.quantity else "0"
@@ -53,37 +69,41 @@ def check_portfolio_cash_accuracy(portfolio_id=15):
             impact = f"+${txn.amount}"
         elif txn.transaction_type == TransactionType.WITHDRAWAL:
             impact = f"-${txn.amount}"
-        elif txn.transaction_type == TransactionType.BUY:
-            impact = f"-${txn.quantity * txn.price}"
-        elif txn.transaction_type == TransactionType.SELL:
-            impact = f"+${txn.quantity * txn.price}"
+        elif txn.transaction_type in (TransactionType.BUY, TransactionType.SELL):
+            total = txn.quantity * txn.price if txn.quantity and txn.price else ZERO
+            sign = "-" if txn.transaction_type == TransactionType.BUY else "+"
+            impact = f"{sign}${total}"
         else:
             impact = "$0"
 
-        print(f"{txn.transaction_date} {txn.transaction_type:<10} {symbol_str:<8} {qty_str:<8} {price_str:<10} {impact:<15}")
+        lines.append(ROW_FMT(txn.transaction_date, txn.transaction_type, symbol_str, qty_str, price_str, impact))
 
-    print("-" * 100)
+    lines.append("-" * 100)
+    print("\n".join(lines))
     print(f"\nCalculated Cash (from all transactions): ${calculated_cash}")
     print(f"Portfolio Cash Balance:                   ${portfolio.cash_balance}")
     print(f"Discrepancy:                              ${portfolio.cash_balance - calculated_cash}")
 
-    if abs(portfolio.cash_balance - calculated_cash) > Decimal("0.01"):
+    if abs(portfolio.cash_balance - calculated_cash) > EPS:
         print("\n⚠️  WARNING: Cash balance discrepancy detected!")
 
         # Check for missing transaction updates
         print("\nChecking for transactions that might not have updated cash...")
 
         # Look for SELL transactions specifically
-        sell_txns = PortfolioTransaction.objects.filter(
-            portfolio=portfolio,
-            transaction_type=TransactionType.SELL
-        ).order_by('-created_at')[:10]
+        sell_txns = list(
+            transactions.filter(
+                transaction_type=TransactionType.SELL
+            ).select_related('symbol').order_by('-created_at')[:10]
+        )
 
-        print(f"\nRecent SELL transactions: {sell_txns.count()}")
+        lines = [f"\nRecent SELL transactions: {len(sell_txns)}"]
         for txn in sell_txns:
-            print(f"  - {txn.symbol.symbol}: {txn.quantity} @ ${txn.price} = ${txn.quantity * txn.price}")
-            print(f"    Date: {txn.transaction_date}, Created: {txn.created_at}")
-            print(f"    Notes: {txn.notes}")
+            total = txn.quantity * txn.price
+            lines.append(f"  - {txn.symbol.symbol}: {txn.quantity} @ ${txn.price} = ${total}")
+            lines.append(f"    Date: {txn.transaction_date}, Created: {txn.created_at}")
+            lines.append(f"    Notes: {txn.notes}")
+        print("\n".join(lines))
     else:
         print("\n✅ Cash balance is accurate!")
 
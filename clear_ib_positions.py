@@ -29,6 +29,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum time to wait for submitted orders to fill or be cancelled
+ORDER_TIMEOUT_SECONDS = 30
+
 
 def clear_all_positions(host: str = "localhost", port: int = 7497, client_id: int = 1, dry_run: bool = False):
     """
@@ -58,7 +61,10 @@ def clear_all_positions(host: str = "localhost", port: int = 7497, client_id: in
 
         logger.info(f"Found {len(positions)} position(s) in IB account:")
         for pos in positions:
-            logger.info(f"  - {pos.contract.symbol} ({pos.contract.exchange}): {pos.position} shares @ avg cost {pos.avgCost}")
+            logger.info(
+                "  - %s (%s): %s shares @ avg cost %s",
+                pos.contract.symbol, pos.contract.exchange, pos.position, pos.avgCost
+            )
 
         # Submit SELL orders for each position
         logger.info(f"\n{'=' * 80}")
@@ -66,6 +72,7 @@ def clear_all_positions(host: str = "localhost", port: int = 7497, client_id: in
         logger.info(f"{'=' * 80}\n")
 
         submitted_trades = []
+        pending = []
 
         for pos in positions:
             symbol = pos.contract.symbol
@@ -73,25 +80,37 @@ def clear_all_positions(host: str = "localhost", port: int = 7497, client_id: in
 
             # Skip if quantity is zero or negative (short positions)
             if pos.position <= 0:
-                logger.warning(f"Skipping {symbol}: position is {pos.position} (zero or short)")
+                logger.warning("Skipping %s: position is %s (zero or short)", symbol, pos.position)
                 continue
 
-            logger.info(f"Processing {symbol}: {quantity} shares")
+            logger.info("Processing %s: %s shares", symbol, quantity)
 
             if dry_run:
-                logger.info(f"  [DRY RUN] Would submit SELL market order for {quantity} shares")
+                logger.info("  [DRY RUN] Would submit SELL market order for %s shares", quantity)
                 continue
 
+            # Recreate contract with SMART routing to avoid direct routing fees/restrictions
+            pending.append((symbol, quantity, Stock(symbol, "SMART", "USD")))
+
+        if pending:
+            # Qualify every contract in a single request instead of one round-trip per position
             try:
-                # Recreate contract with SMART routing to avoid direct routing fees/restrictions
-                contract = Stock(symbol, "SMART", "USD")
-                ib.qualifyContracts(contract)
+                ib.qualifyContracts(*[contract for _, _, contract in pending])
+            except Exception as e:
+                logger.error(f"  ✗ Failed to qualify contracts: {e}")
+
+        # Submit all orders back-to-back; IB fills them in parallel
+        for symbol, quantity, contract in pending:
+            if not contract.conId:
+                logger.error("  ✗ Failed to submit order for %s: contract could not be qualified", symbol)
+                continue
 
+            try:
                 # Create SELL market order
                 order = MarketOrder("SELL", quantity)
 
                 # Submit order
-                logger.info(f"  Submitting SELL market order for {quantity} shares...")
+                logger.info("  Submitting SELL market order for %s (%s shares)...", symbol, quantity)
                 trade = ib.placeOrder(contract, order)
 
                 submitted_trades.append({
@@ -100,13 +119,10 @@ def clear_all_positions(host: str = "localhost", port: int = 7497, client_id: in
                     "trade": trade
                 })
 
-                logger.info(f"  ✓ Order submitted (Order ID: {trade.order.orderId})")
-
-                # Small delay between orders
-                time.sleep(0.5)
+                logger.info("  ✓ Order submitted (Order ID: %s)", trade.order.orderId)
 
             except Exception as e:
-                logger.error(f"  ✗ Failed to submit order for {symbol}: {e}")
+                logger.error("  ✗ Failed to submit order for %s: %s", symbol, e)
 
         if dry_run:
             logger.info(f"\n{'=' * 80}")
@@ -120,18 +136,21 @@ def clear_all_positions(host: str = "localhost", port: int = 7497, client_id: in
             logger.info(f"Waiting for order confirmations...")
             logger.info(f"{'=' * 80}\n")
 
-            # Wait and check order status multiple times
-            for i in range(6):  # Check 6 times over 30 seconds
-                ib.sleep(5)
-
-                logger.info(f"Checking order status... ({(i+1)*5}s)")
+            # Wake up on every IB update and stop as soon as all orders are done
+            deadline = time.monotonic() + ORDER_TIMEOUT_SECONDS
+            while any(not order_info["trade"].isDone() for order_info in submitted_trades):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Timed out after {ORDER_TIMEOUT_SECONDS}s waiting for orders to complete")
+                    break
+                ib.waitOnUpdate(timeout=remaining)
 
-                for order_info in submitted_trades:
-                    trade = order_info["trade"]
-                    status = trade.orderStatus.status
-                    filled = trade.orderStatus.filled
+            for order_info in submitted_trades:
+                trade = order_info["trade"]
+                status = trade.orderStatus.status
+                filled = trade.orderStatus.filled
 
-                    logger.info(f"  {order_info['symbol']}: {status} ({filled}/{order_info['quantity']} filled)")
+                logger.info("  %s: %s (%s/%s filled)", order_info["symbol"], status, filled, order_info["quantity"])
 
             logger.info(f"\n{'=' * 80}")
             logger.info("✓ Order monitoring complete")
@@ -146,7 +165,7 @@ def clear_all_positions(host: str = "localhost", port: int = 7497, client_id: in
             else:
                 logger.warning(f"⚠ {len(final_positions)} position(s) still remaining:")
                 for pos in final_positions:
-                    logger.warning(f"  - {pos.contract.symbol}: {pos.position} shares")
+                    logger.warning("  - %s: %s shares", pos.contract.symbol, pos.position)
 
         return True
 
@@ -1,19 +1,12 @@
 import os
 
-# This muckery is required - django must be fully setup before we load the
-# channels, as the channels require models, which require settings, which...
-# you get the idea.
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
-import django
-
-django.setup()
-
-from celery import Celery  # noqa
+from celery import Celery
 
+# Celery's Django fixup calls django.setup() when the worker or beat starts,
+# so the app registry is only populated once per process.
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 app = Celery("core")
 
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
-
-app.conf.beat_scheduler = "django_celery_beat.schedulers:DatabaseScheduler"
@@ -171,6 +171,11 @@ if IS_LOCAL_DEV or IS_TEST_DEV:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # Wait for the writer lock instead of failing with "database is locked"
+            # (WAL and the other pragmas are applied in ZimuabullConfig.ready)
+            "OPTIONS": {
+                "timeout": 20,
+            },
         }
     }
 else:
@@ -235,6 +240,33 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # OpenAI integration
 OPENAI_API_KEY = get_env_variable("OPENAI_API_KEY")
 OPENAI_MODEL = get_env_variable("OPENAI_MODEL", "gpt-4.1-mini")
+# Retries for 408/409/429/5xx and connection errors (exponential backoff with jitter, honours Retry-After)
+OPENAI_MAX_RETRIES = int(get_env_variable("OPENAI_MAX_RETRIES", "4"))
+# Score news sentiment through the OpenAI Batch API (half price, results within 24h) instead of one call per article
+NEWS_SENTIMENT_USE_BATCH = os.environ.get("NEWS_SENTIMENT_USE_BATCH", "false").lower() == "true"
+# A chat question re-sent before any new reply (a retry or double submit) reuses the cached reply for this long
+CHAT_REPLY_CACHE_TIMEOUT = int(get_env_variable("CHAT_REPLY_CACHE_TIMEOUT", "300"))
+# Dedicated Redis URL for the reply cache; never shared with the Celery broker
+CHAT_CACHE_URL = os.environ.get("CHAT_CACHE_URL")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Per-process memory when no dedicated Redis is configured
+    "chat": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CHAT_CACHE_URL,
+            "KEY_PREFIX": "chat",
+        }
+        if CHAT_CACHE_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "chat",
+        }
+    ),
+}
 
 # Celery Settings
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379")
@@ -320,6 +352,11 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute="*/5"),  # Every 5 minutes, 24/7
         "options": {"queue": "pidashtasks"},
     },
+    "collect_news_sentiment_batches": {
+        "task": "zimuabull.tasks.news_sentiment.collect_news_sentiment_batches",
+        "schedule": crontab(minute="*/10"),  # No-op unless NEWS_SENTIMENT_USE_BATCH left batches open
+        "options": {"queue": "pidashtasks"},
+    },
     "day_trading_weekly_model_refresh": {
         "task": "zimuabull.tasks.day_trading.weekly_model_refresh",
         "schedule": crontab(hour=22, minute=0, day_of_week="0"),
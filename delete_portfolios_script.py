@@ -9,9 +9,12 @@ Usage:
 Or copy/paste directly into IPython:
 """
 
+from django.db import transaction
+
 from zimuabull.models import (
-    Portfolio, PortfolioTransaction, PortfolioHolding,
-    PortfolioSnapshot, DayTradingRecommendation
+    Portfolio, PortfolioTransaction, PortfolioHolding, PortfolioHoldingLog,
+    PortfolioSnapshot, PortfolioRiskMetrics, DayTradePosition, IBOrder,
+    DayTradingRecommendation
 )
 
 # Count before deletion
@@ -22,28 +25,25 @@ print(f"Holdings: {PortfolioHolding.objects.count()}")
 print(f"Snapshots: {PortfolioSnapshot.objects.count()}")
 print(f"Day Trading Recommendations: {DayTradingRecommendation.objects.count()}")
 
-# Delete all (cascade will handle related records)
+# Delete everything with plain DELETE statements. _raw_delete skips the
+# collector (no rows loaded into Python, no signals, no cascade traversal),
+# so child tables must be emptied before their parents.
 print("\n=== DELETING ===")
 
-# Delete transactions first (no cascade dependencies)
-deleted_transactions = PortfolioTransaction.objects.all().delete()
-print(f"Deleted transactions: {deleted_transactions[0]}")
-
-# Delete holdings (no cascade dependencies)
-deleted_holdings = PortfolioHolding.objects.all().delete()
-print(f"Deleted holdings: {deleted_holdings[0]}")
-
-# Delete snapshots (no cascade dependencies)
-deleted_snapshots = PortfolioSnapshot.objects.all().delete()
-print(f"Deleted snapshots: {deleted_snapshots[0]}")
-
-# Delete day trading recommendations (has symbol FK but can be deleted)
-deleted_recommendations = DayTradingRecommendation.objects.all().delete()
-print(f"Deleted day trading recommendations: {deleted_recommendations[0]}")
-
-# Delete portfolios last (will cascade to any remaining related records)
-deleted_portfolios = Portfolio.objects.all().delete()
-print(f"Deleted portfolios: {deleted_portfolios[0]}")
+with transaction.atomic():
+    for label, model in (
+        ("holding logs", PortfolioHoldingLog),
+        ("IB orders", IBOrder),
+        ("day trade positions", DayTradePosition),
+        ("transactions", PortfolioTransaction),
+        ("holdings", PortfolioHolding),
+        ("snapshots", PortfolioSnapshot),
+        ("risk metrics", PortfolioRiskMetrics),
+        ("day trading recommendations", DayTradingRecommendation),
+        ("portfolios", Portfolio),
+    ):
+        deleted = model._base_manager.all()._raw_delete(model._base_manager.db)
+        print(f"Deleted {label}: {deleted}")
 
 # Count after deletion
 print("\n=== AFTER DELETION ===")
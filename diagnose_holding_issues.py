@@ -4,18 +4,26 @@ Diagnose portfolio holding issues by analyzing logs and current state
 """
 import os
 import django
+from django.apps import apps
 from decimal import Decimal
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-django.setup()
+if not apps.ready:  # Already booted when imported by `manage.py diagnose`
+    django.setup()
 
 from zimuabull.models import (
     Portfolio, PortfolioHolding, PortfolioTransaction,
-    PortfolioHoldingLog, Symbol
+    PortfolioHoldingLog
 )
-from django.db.models import Sum, Count
+from django.db.models import Count, Q
+from itertools import groupby
 import sys
 
+def _write_section(lines):
+    """Write buffered report lines to stdout in one call and reset the buffer"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    lines.clear()
+
 def diagnose_portfolio(portfolio_id):
     """Comprehensive diagnosis of portfolio holding issues"""
 
@@ -25,77 +33,90 @@ def diagnose_portfolio(portfolio_id):
         print(f"Portfolio {portfolio_id} not found")
         return
 
-    print(f"\n{'='*100}")
-    print(f"PORTFOLIO DIAGNOSIS: {portfolio.name} (ID: {portfolio_id})")
-    print(f"{'='*100}\n")
+    # Buffer each section and write it with a single stdout call
+    out = []
+    out.append(f"\n{'='*100}")
+    out.append(f"PORTFOLIO DIAGNOSIS: {portfolio.name} (ID: {portfolio_id})")
+    out.append(f"{'='*100}\n")
 
     # 1. Check for SELL_ERROR logs
-    print("1. CHECKING FOR SELL ERRORS")
-    print("-" * 100)
-    sell_errors = PortfolioHoldingLog.objects.filter(
+    out.append("1. CHECKING FOR SELL ERRORS")
+    out.append("-" * 100)
+    sell_errors = list(PortfolioHoldingLog.objects.filter(
         portfolio=portfolio,
         operation='SELL_ERROR'
-    )
+    ).select_related('symbol'))
 
-    if sell_errors.exists():
-        print(f"⚠️  FOUND {sell_errors.count()} SELL ERRORS:")
+    if sell_errors:
+        out.append(f"⚠️  FOUND {len(sell_errors)} SELL ERRORS:")
         for error in sell_errors:
-            print(f"  - {error.created_at}: {error.symbol.symbol}")
-            print(f"    Transaction: SELL {error.transaction_quantity} @ ${error.transaction_price}")
-            print(f"    Note: {error.notes}")
-            print()
+            out.append(f"  - {error.created_at}: {error.symbol.symbol}")
+            out.append(f"    Transaction: SELL {error.transaction_quantity} @ ${error.transaction_price}")
+            out.append(f"    Note: {error.notes}")
+            out.append("")
     else:
-        print("✓ No sell errors found")
-    print()
+        out.append("✓ No sell errors found")
+    out.append("")
+
+    _write_section(out)
 
     # 2. Check for holdings with zero or negative quantity
-    print("2. CHECKING FOR INVALID HOLDINGS (zero or negative quantity)")
-    print("-" * 100)
-    invalid_holdings = PortfolioHolding.objects.filter(
+    out.append("2. CHECKING FOR INVALID HOLDINGS (zero or negative quantity)")
+    out.append("-" * 100)
+    invalid_holdings = list(PortfolioHolding.objects.filter(
         portfolio=portfolio,
         status='ACTIVE',
         quantity__lte=0
-    )
+    ).select_related('symbol'))
+
+    if invalid_holdings:
+        # Find the SELL transaction that should have deleted each holding (newest log per symbol)
+        last_logs = {}
+        for log in PortfolioHoldingLog.objects.filter(
+            portfolio=portfolio,
+            symbol_id__in=[holding.symbol_id for holding in invalid_holdings],
+            operation__in=['UPDATE', 'DELETE']
+        ).order_by('-created_at'):
+            last_logs.setdefault(log.symbol_id, log)
 
-    if invalid_holdings.exists():
-        print(f"⚠️  FOUND {invalid_holdings.count()} INVALID HOLDINGS:")
+        out.append(f"⚠️  FOUND {len(invalid_holdings)} INVALID HOLDINGS:")
         for holding in invalid_holdings:
-            print(f"  - {holding.symbol.symbol}: {holding.quantity} shares (SHOULD BE DELETED)")
+            out.append(f"  - {holding.symbol.symbol}: {holding.quantity} shares (SHOULD BE DELETED)")
 
-            # Find the SELL transaction that should have deleted it
-            last_log = PortfolioHoldingLog.objects.filter(
-                portfolio=portfolio,
-                symbol=holding.symbol,
-                operation__in=['UPDATE', 'DELETE']
-            ).order_by('-created_at').first()
+            last_log = last_logs.get(holding.symbol_id)
 
             if last_log:
-                print(f"    Last operation: {last_log.operation} at {last_log.created_at}")
-                print(f"    {last_log.notes}")
-            print()
+                out.append(f"    Last operation: {last_log.operation} at {last_log.created_at}")
+                out.append(f"    {last_log.notes}")
+            out.append("")
     else:
-        print("✓ No invalid holdings found")
-    print()
+        out.append("✓ No invalid holdings found")
+    out.append("")
+
+    _write_section(out)
 
     # 3. Analyze holding operations by symbol
-    print("3. HOLDINGS WITH SUSPICIOUS PATTERNS")
-    print("-" * 100)
+    out.append("3. HOLDINGS WITH SUSPICIOUS PATTERNS")
+    out.append("-" * 100)
 
-    # Get all symbols that have been traded
-    traded_symbols = PortfolioHoldingLog.objects.filter(
+    # Get all logs for every traded symbol in one query, grouped by symbol
+    all_logs = PortfolioHoldingLog.objects.filter(
         portfolio=portfolio
-    ).values_list('symbol', flat=True).distinct()
+    ).select_related('symbol').order_by('symbol_id', 'created_at')
+    logs_by_symbol = {
+        symbol_id: list(logs) for symbol_id, logs in groupby(all_logs, key=lambda log: log.symbol_id)
+    }
 
-    suspicious_found = False
+    # Current active holdings, keyed by symbol
+    active_holdings_by_symbol = {
+        holding.symbol_id: holding
+        for holding in PortfolioHolding.objects.filter(portfolio=portfolio, status='ACTIVE')
+    }
 
-    for symbol_id in traded_symbols:
-        symbol = Symbol.objects.get(id=symbol_id)
+    suspicious_found = False
 
-        # Get all logs for this symbol
-        logs = PortfolioHoldingLog.objects.filter(
-            portfolio=portfolio,
-            symbol=symbol
-        ).order_by('created_at')
+    for logs in logs_by_symbol.values():
+        symbol = logs[0].symbol
 
         # Calculate expected final quantity
         final_qty = Decimal('0')
@@ -111,79 +132,80 @@ def diagnose_portfolio(portfolio_id):
                 final_qty = Decimal('0')
 
         # Check if current holding matches expected
-        try:
-            current_holding = PortfolioHolding.objects.get(
-                portfolio=portfolio,
-                symbol=symbol,
-                status='ACTIVE'
-            )
+        current_holding = active_holdings_by_symbol.get(symbol.id)
+        if current_holding is not None:
             current_qty = current_holding.quantity
 
             if current_qty != final_qty:
                 suspicious_found = True
-                print(f"⚠️  MISMATCH: {symbol.symbol}")
-                print(f"  Expected quantity: {final_qty}")
-                print(f"  Actual quantity: {current_qty}")
-                print(f"  Difference: {current_qty - final_qty}")
-                print(f"  Total operations: {logs.count()}")
-                print()
-
-        except PortfolioHolding.DoesNotExist:
-            if final_qty != Decimal('0'):
-                suspicious_found = True
-                print(f"⚠️  MISSING HOLDING: {symbol.symbol}")
-                print(f"  Expected quantity: {final_qty}")
-                print(f"  Actual: No holding found")
-                print(f"  Last operation: {logs.last().operation}")
-                print()
+                out.append(f"⚠️  MISMATCH: {symbol.symbol}")
+                out.append(f"  Expected quantity: {final_qty}")
+                out.append(f"  Actual quantity: {current_qty}")
+                out.append(f"  Difference: {current_qty - final_qty}")
+                out.append(f"  Total operations: {len(logs)}")
+                out.append("")
+
+        elif final_qty != Decimal('0'):
+            suspicious_found = True
+            out.append(f"⚠️  MISSING HOLDING: {symbol.symbol}")
+            out.append(f"  Expected quantity: {final_qty}")
+            out.append(f"  Actual: No holding found")
+            out.append(f"  Last operation: {logs[-1].operation}")
+            out.append("")
 
     if not suspicious_found:
-        print("✓ No suspicious patterns found")
-    print()
+        out.append("✓ No suspicious patterns found")
+    out.append("")
+
+    _write_section(out)
 
     # 4. Compare transactions with logs
-    print("4. TRANSACTION vs LOG CONSISTENCY CHECK")
-    print("-" * 100)
+    out.append("4. TRANSACTION vs LOG CONSISTENCY CHECK")
+    out.append("-" * 100)
 
-    transactions = PortfolioTransaction.objects.filter(
-        portfolio=portfolio,
-        transaction_type__in=['BUY', 'SELL']
+    txns_without_logs = list(
+        PortfolioTransaction.objects.filter(
+            portfolio=portfolio,
+            transaction_type__in=['BUY', 'SELL']
+        ).exclude(
+            id__in=PortfolioHoldingLog.objects.filter(
+                transaction__isnull=False
+            ).values('transaction_id')
+        ).select_related('symbol')
     )
 
-    txns_without_logs = []
-    for txn in transactions:
-        log_exists = PortfolioHoldingLog.objects.filter(transaction=txn).exists()
-        if not log_exists:
-            txns_without_logs.append(txn)
-
     if txns_without_logs:
-        print(f"⚠️  FOUND {len(txns_without_logs)} TRANSACTIONS WITHOUT LOGS:")
-        print("These transactions were created BEFORE logging was implemented")
+        out.append(f"⚠️  FOUND {len(txns_without_logs)} TRANSACTIONS WITHOUT LOGS:")
+        out.append("These transactions were created BEFORE logging was implemented")
         for txn in txns_without_logs[:10]:  # Show first 10
-            print(f"  - {txn.transaction_date}: {txn.transaction_type} {txn.quantity} {txn.symbol.symbol}")
+            out.append(f"  - {txn.transaction_date}: {txn.transaction_type} {txn.quantity} {txn.symbol.symbol}")
         if len(txns_without_logs) > 10:
-            print(f"  ... and {len(txns_without_logs) - 10} more")
-        print()
+            out.append(f"  ... and {len(txns_without_logs) - 10} more")
+        out.append("")
     else:
-        print("✓ All transactions have corresponding logs")
-    print()
+        out.append("✓ All transactions have corresponding logs")
+    out.append("")
+
+    _write_section(out)
 
     # 5. Summary statistics
-    print("5. SUMMARY STATISTICS")
-    print("-" * 100)
-
-    total_logs = PortfolioHoldingLog.objects.filter(portfolio=portfolio).count()
-    creates = PortfolioHoldingLog.objects.filter(portfolio=portfolio, operation='CREATE').count()
-    updates = PortfolioHoldingLog.objects.filter(portfolio=portfolio, operation='UPDATE').count()
-    deletes = PortfolioHoldingLog.objects.filter(portfolio=portfolio, operation='DELETE').count()
-    errors = PortfolioHoldingLog.objects.filter(portfolio=portfolio, operation='SELL_ERROR').count()
-
-    print(f"Total logs: {total_logs}")
-    print(f"  - CREATE operations: {creates}")
-    print(f"  - UPDATE operations: {updates}")
-    print(f"  - DELETE operations: {deletes}")
-    print(f"  - SELL_ERROR operations: {errors}")
-    print()
+    out.append("5. SUMMARY STATISTICS")
+    out.append("-" * 100)
+
+    stats = PortfolioHoldingLog.objects.filter(portfolio=portfolio).aggregate(
+        total=Count('id'),
+        creates=Count('id', filter=Q(operation='CREATE')),
+        updates=Count('id', filter=Q(operation='UPDATE')),
+        deletes=Count('id', filter=Q(operation='DELETE')),
+        errors=Count('id', filter=Q(operation='SELL_ERROR')),
+    )
+
+    out.append(f"Total logs: {stats['total']}")
+    out.append(f"  - CREATE operations: {stats['creates']}")
+    out.append(f"  - UPDATE operations: {stats['updates']}")
+    out.append(f"  - DELETE operations: {stats['deletes']}")
+    out.append(f"  - SELL_ERROR operations: {stats['errors']}")
+    out.append("")
 
     active_holdings = PortfolioHolding.objects.filter(
         portfolio=portfolio,
@@ -194,34 +216,37 @@ def diagnose_portfolio(portfolio_id):
         portfolio=portfolio
     ).count()
 
-    print(f"Current active holdings: {active_holdings}")
-    print(f"Total transactions: {total_txns}")
-    print()
+    out.append(f"Current active holdings: {active_holdings}")
+    out.append(f"Total transactions: {total_txns}")
+    out.append("")
+
+    _write_section(out)
 
     # 6. Recommendations
-    print("6. RECOMMENDATIONS")
-    print("-" * 100)
+    out.append("6. RECOMMENDATIONS")
+    out.append("-" * 100)
 
-    if sell_errors.exists():
-        print("• Investigate SELL_ERROR operations - these indicate attempts to sell non-existent holdings")
+    if sell_errors:
+        out.append("• Investigate SELL_ERROR operations - these indicate attempts to sell non-existent holdings")
 
-    if invalid_holdings.exists():
-        print("• Clean up invalid holdings with zero/negative quantity")
-        print("  You can delete these manually or run a cleanup script")
+    if invalid_holdings:
+        out.append("• Clean up invalid holdings with zero/negative quantity")
+        out.append("  You can delete these manually or run a cleanup script")
 
     if suspicious_found:
-        print("• Review holdings with quantity mismatches")
-        print("  The logs show what SHOULD be, vs what IS in the database")
+        out.append("• Review holdings with quantity mismatches")
+        out.append("  The logs show what SHOULD be, vs what IS in the database")
 
-    if not sell_errors.exists() and not invalid_holdings.exists() and not suspicious_found:
-        print("✓ No issues detected! Portfolio holdings appear to be in good state.")
+    if not sell_errors and not invalid_holdings and not suspicious_found:
+        out.append("✓ No issues detected! Portfolio holdings appear to be in good state.")
 
-    print()
-    print("To view detailed logs, run:")
-    print(f"  .venv/bin/python view_holding_logs.py {portfolio_id}")
-    print()
-    print("="*100 + "\n")
+    out.append("")
+    out.append("To view detailed logs, run:")
+    out.append(f"  .venv/bin/python view_holding_logs.py {portfolio_id}")
+    out.append("")
+    out.append("="*100 + "\n")
 
+    _write_section(out)
 
 if __name__ == '__main__':
     portfolio_id = int(sys.argv[1]) if len(sys.argv) > 1 else 15
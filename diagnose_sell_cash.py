@@ -5,14 +5,16 @@ Run this to investigate why cash isn't being added on SELL orders.
 """
 import os
 import django
+from django.apps import apps
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-django.setup()
+if not apps.ready:  # Already booted when imported by `manage.py diagnose`
+    django.setup()
 
 from decimal import Decimal
 from zimuabull.models import (
     Portfolio, IBOrder, IBOrderStatus, IBOrderAction,
-    PortfolioTransaction, TransactionType
+    PortfolioHoldingLog, PortfolioTransaction, TransactionType
 )
 from django.utils import timezone
 
@@ -23,16 +25,36 @@ def check_recent_sell_orders():
     print("=" * 80)
 
     # Get filled SELL orders from last 7 days
-    recent_sells = IBOrder.objects.filter(
-        action=IBOrderAction.SELL,
-        status=IBOrderStatus.FILLED,
-        filled_at__isnull=False
-    ).order_by('-filled_at')[:10]
+    recent_sells = list(
+        IBOrder.objects.select_related('symbol', 'portfolio').filter(
+            action=IBOrderAction.SELL,
+            status=IBOrderStatus.FILLED,
+            filled_at__isnull=False
+        ).order_by('-filled_at')[:10]
+    )
 
     if not recent_sells:
         print("\n❌ No filled SELL orders found")
         return
 
+    # Fetch candidate SELL transactions for every order at once, keyed the
+    # same way each order is matched (portfolio, symbol, quantity, price)
+    txns_by_key = {}
+    txn_keys = {}
+    for txn in PortfolioTransaction.objects.filter(
+        portfolio_id__in={order.portfolio_id for order in recent_sells},
+        symbol_id__in={order.symbol_id for order in recent_sells},
+        transaction_type=TransactionType.SELL,
+    ).order_by('-transaction_date', '-created_at'):
+        key = (txn.portfolio_id, txn.symbol_id, txn.quantity, txn.price)
+        txns_by_key.setdefault(key, []).append(txn)
+        txn_keys[txn.id] = key
+
+    # Holding logs for those transactions, newest first
+    logs_by_key = {}
+    for log in PortfolioHoldingLog.objects.filter(transaction_id__in=list(txn_keys)).order_by('-created_at'):
+        logs_by_key.setdefault(txn_keys[log.transaction_id], []).append(log)
+
     for order in recent_sells:
         print(f"\n{'='*80}")
         print(f"Order: {order.client_order_id}")
@@ -46,15 +68,10 @@ def check_recent_sell_orders():
         print(f"Status: {order.status}")
 
         # Check for corresponding transaction
-        transactions = PortfolioTransaction.objects.filter(
-            portfolio=order.portfolio,
-            symbol=order.symbol,
-            transaction_type=TransactionType.SELL,
-            quantity=order.filled_quantity,
-            price=order.filled_price,
-        )
+        key = (order.portfolio_id, order.symbol_id, order.filled_quantity, order.filled_price)
+        transactions = txns_by_key.get(key, [])
 
-        print(f"\nCorresponding Transactions: {transactions.count()}")
+        print(f"\nCorresponding Transactions: {len(transactions)}")
         for txn in transactions:
             print(f"  - Transaction ID: {txn.id}")
             print(f"    Type: {txn.transaction_type}")
@@ -65,14 +82,9 @@ def check_recent_sell_orders():
             print(f"    Notes: {txn.notes}")
 
         # Check portfolio holding logs
-        from zimuabull.models import PortfolioHoldingLog
-        logs = PortfolioHoldingLog.objects.filter(
-            portfolio=order.portfolio,
-            symbol=order.symbol,
-            transaction__in=transactions
-        ).order_by('-created_at')
-
-        print(f"\nHolding Logs: {logs.count()}")
+        logs = logs_by_key.get(key, [])
+
+        print(f"\nHolding Logs: {len(logs)}")
         for log in logs:
             print(f"  - Operation: {log.operation}")
             print(f"    Qty Before: {log.quantity_before} -> After: {log.quantity_after}")
@@ -93,14 +105,16 @@ def check_cash_balance_changes():
         print(f"Current Cash: ${portfolio.cash_balance}")
 
         # Get recent SELL orders
-        sells = IBOrder.objects.filter(
-            portfolio=portfolio,
-            action=IBOrderAction.SELL,
-            status=IBOrderStatus.FILLED
-        ).order_by('-filled_at')[:5]
+        sells = list(
+            IBOrder.objects.filter(
+                portfolio=portfolio,
+                action=IBOrderAction.SELL,
+                status=IBOrderStatus.FILLED
+            ).select_related('symbol').order_by('-filled_at')[:5]
+        )
 
         if sells:
-            print(f"\nRecent SELL Orders: {sells.count()}")
+            print(f"\nRecent SELL Orders: {len(sells)}")
             for order in sells:
                 expected_cash_increase = order.filled_quantity * order.filled_price
                 print(f"  - {order.symbol.symbol}: Filled {order.filled_quantity} @ ${order.filled_price}")
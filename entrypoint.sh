@@ -44,7 +44,7 @@ case "$1" in
     exec celery -A core worker --loglevel=info
     ;;
   beat)
-    exec celery -A core beat --loglevel=info --scheduler=django_celery_beat.schedulers:DatabaseScheduler
+    exec celery -A core beat --loglevel=info
     ;;
   *)
     # pass through any other command, e.g. "bash"
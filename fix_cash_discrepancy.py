@@ -3,11 +3,14 @@ Fix the cash balance discrepancy by calculating correct balance from all transac
 """
 import os
 import django
+from django.apps import apps
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-django.setup()
+if not apps.ready:  # Already booted when imported by `manage.py diagnose`
+    django.setup()
 
 from decimal import Decimal
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
 from zimuabull.models import Portfolio, PortfolioTransaction, TransactionType
 
 def fix_portfolio_cash(portfolio_id=15, dry_run=True):
@@ -18,24 +21,27 @@ def fix_portfolio_cash(portfolio_id=15, dry_run=True):
     print(f"Current Cash Balance: ${portfolio.cash_balance}")
     print()
 
-    # Calculate correct cash from all transactions
-    transactions = PortfolioTransaction.objects.filter(
+    # Calculate correct cash from all transactions in a single aggregate query
+    totals = PortfolioTransaction.objects.filter(
         portfolio=portfolio
-    ).order_by('transaction_date', 'created_at')
+    ).aggregate(
+        count=Count('id'),
+        cash=Sum(
+            Case(
+                When(transaction_type=TransactionType.DEPOSIT, then=F('amount')),
+                When(transaction_type=TransactionType.WITHDRAWAL, then=-F('amount')),
+                When(transaction_type=TransactionType.BUY, then=-F('quantity') * F('price')),
+                When(transaction_type=TransactionType.SELL, then=F('quantity') * F('price')),
+                default=Value(Decimal("0")),
+                output_field=DecimalField(max_digits=20, decimal_places=6),
+            )
+        ),
+    )
+    # Quantized to cents: the aggregate carries 6 decimal places (and float noise on SQLite),
+    # and this value is compared with, and may be written to, the 2-decimal cash_balance
+    calculated_cash = (totals['cash'] or Decimal("0")).quantize(Decimal("0.01"))
 
-    calculated_cash = Decimal("0")
-
-    print(f"Analyzing {transactions.count()} transactions...\n")
-
-    for txn in transactions:
-        if txn.transaction_type == TransactionType.DEPOSIT:
-            calculated_cash += txn.amount
-        elif txn.transaction_type == TransactionType.WITHDRAWAL:
-            calculated_cash -= txn.amount
-        elif txn.transaction_type == TransactionType.BUY:
-            calculated_cash -= (txn.quantity * txn.price)
-        elif txn.transaction_type == TransactionType.SELL:
-            calculated_cash += (txn.quantity * txn.price)
+    print(f"Analyzed {totals['count']} transactions\n")
 
     print(f"Calculated Cash (from transactions): ${calculated_cash}")
     print(f"Current Portfolio Cash:               ${portfolio.cash_balance}")
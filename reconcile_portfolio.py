@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 """
-Reconcile portfolio 15 transactions and calculate expected value
+Reconcile portfolio transactions and calculate expected value.
+
+Usage: python reconcile_portfolio.py [portfolio_id ...] [--verbose]  (defaults to portfolio 15)
 """
 import os
 import django
@@ -10,47 +12,91 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
 from zimuabull.models import Portfolio, PortfolioTransaction, PortfolioHolding
-from django.db.models import Sum
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from django.db import connection
+
+# Bounded so a long id list cannot exhaust the database's connection limit
+MAX_WORKERS = 8
+
+# Ledger rows: date, type, [symbol, quantity, price,] amount, running cash
+CASH_ROW_FMT = "{} {:<12} {:<8} {:<10} {:<10} ${:>10.2f} ${:>13.2f}\n".format
+TRADE_ROW_FMT = "{} {:<12} {:<8} {:>9.4f} ${:>8.2f} ${:>10.2f} ${:>13.2f}\n".format
 
-def reconcile_portfolio(portfolio_id):
-    """Reconcile all transactions for a portfolio"""
+def reconcile_portfolio(portfolio_id, verbose=False, out=None):
+    """Reconcile all transactions for a portfolio (verbose prints the full transaction ledger)"""
+    out = out or sys.stdout
+    write = partial(print, file=out)
 
     try:
         portfolio = Portfolio.objects.get(id=portfolio_id)
     except Portfolio.DoesNotExist:
-        print(f"Portfolio {portfolio_id} not found")
+        write(f"Portfolio {portfolio_id} not found")
         return
 
-    print(f"\n{'='*80}")
-    print(f"PORTFOLIO RECONCILIATION: {portfolio.name} (ID: {portfolio_id})")
-    print(f"{'='*80}\n")
+    write(f"\n{'='*80}")
+    write(f"PORTFOLIO RECONCILIATION: {portfolio.name} (ID: {portfolio_id})")
+    write(f"{'='*80}\n")
 
     # Get all transactions ordered chronologically
-    transactions = portfolio.transactions.all().order_by('transaction_date', 'created_at')
-
-    print(f"Total transactions: {transactions.count()}\n")
-
-    # Track cash and holdings manually
-    cash_balance = Decimal('0')
+    transactions = portfolio.transactions.select_related('symbol').only(
+        'transaction_type', 'quantity', 'price', 'amount', 'transaction_date', 'created_at',
+        'symbol__symbol', 'symbol__last_close'
+    ).order_by('transaction_date', 'created_at')
+
+    # Let the database compute the transaction count and expected cash in one query
+    totals = transactions.aggregate(
+        count=Count('id'),
+        cash=Sum(
+            Case(
+                When(transaction_type='DEPOSIT', then=F('amount')),
+                When(transaction_type='WITHDRAWAL', then=-F('amount')),
+                When(transaction_type='BUY', then=-F('quantity') * F('price')),
+                When(transaction_type='SELL', then=F('quantity') * F('price')),
+                default=Value(Decimal('0')),
+                output_field=DecimalField(max_digits=20, decimal_places=6),
+            )
+        ),
+    )
+    # Quantized to cents: the aggregate carries 6 decimal places (and float noise on SQLite)
+    cash_balance = (totals['cash'] or Decimal('0')).quantize(Decimal('0.01'))
+
+    write(f"Total transactions: {totals['count']}\n")
+
+    # Holdings still need an ordered walk over BUY/SELL rows: the average cost
+    # resets whenever a position is fully closed, which a GROUP BY cannot express.
+    # Cash-only rows are walked just to print the full ledger in verbose mode.
+    if not verbose:
+        transactions = transactions.filter(transaction_type__in=['BUY', 'SELL'])
+
+    running_cash = Decimal('0')
     holdings = {}  # symbol_id -> {quantity, total_cost}
 
-    print(f"{'Date':<12} {'Type':<12} {'Symbol':<8} {'Qty':<10} {'Price':<10} {'Amount':<12} {'Cash Balance':<15}")
-    print(f"{'-'*100}")
+    ledger = []  # Verbose ledger rows, written in one call after the walk
+    if verbose:
+        write(f"{'Date':<12} {'Type':<12} {'Symbol':<8} {'Qty':<10} {'Price':<10} {'Amount':<12} {'Cash Balance':<15}")
+        write(f"{'-'*100}")
 
-    for txn in transactions:
+    # Stream rows in chunks (server-side cursor on PostgreSQL) to keep memory flat on large portfolios
+    for txn in transactions.iterator(chunk_size=2000):
         if txn.transaction_type == 'DEPOSIT':
-            cash_balance += txn.amount
-            print(f"{txn.transaction_date} {'DEPOSIT':<12} {'-':<8} {'-':<10} {'-':<10} ${txn.amount:>10.2f} ${cash_balance:>13.2f}")
+            running_cash += txn.amount
+            if verbose:
+                ledger.append(CASH_ROW_FMT(txn.transaction_date, 'DEPOSIT', '-', '-', '-', txn.amount, running_cash))
 
         elif txn.transaction_type == 'WITHDRAWAL':
-            cash_balance -= txn.amount
-            print(f"{txn.transaction_date} {'WITHDRAWAL':<12} {'-':<8} {'-':<10} {'-':<10} ${-txn.amount:>10.2f} ${cash_balance:>13.2f}")
+            running_cash -= txn.amount
+            if verbose:
+                ledger.append(CASH_ROW_FMT(txn.transaction_date, 'WITHDRAWAL', '-', '-', '-', -txn.amount, running_cash))
 
         elif txn.transaction_type == 'BUY':
-            symbol_id = txn.symbol.id
+            symbol_id = txn.symbol_id
             symbol_code = txn.symbol.symbol
             amount = txn.quantity * txn.price
-            cash_balance -= amount
+            running_cash -= amount
 
             if symbol_id not in holdings:
                 holdings[symbol_id] = {
@@ -62,13 +108,14 @@ def reconcile_portfolio(portfolio_id):
             holdings[symbol_id]['quantity'] += txn.quantity
             holdings[symbol_id]['total_cost'] += amount
 
-            print(f"{txn.transaction_date} {'BUY':<12} {symbol_code:<8} {txn.quantity:>9.4f} ${txn.price:>8.2f} ${-amount:>10.2f} ${cash_balance:>13.2f}")
+            if verbose:
+                ledger.append(TRADE_ROW_FMT(txn.transaction_date, 'BUY', symbol_code, txn.quantity, txn.price, -amount, running_cash))
 
         elif txn.transaction_type == 'SELL':
-            symbol_id = txn.symbol.id
+            symbol_id = txn.symbol_id
             symbol_code = txn.symbol.symbol
             amount = txn.quantity * txn.price
-            cash_balance += amount
+            running_cash += amount
 
             if symbol_id in holdings:
                 # Calculate proportion of cost basis being sold
@@ -83,14 +130,17 @@ def reconcile_portfolio(portfolio_id):
                     if holdings[symbol_id]['quantity'] <= 0:
                         del holdings[symbol_id]
 
-            print(f"{txn.transaction_date} {'SELL':<12} {symbol_code:<8} {txn.quantity:>9.4f} ${txn.price:>8.2f} ${amount:>10.2f} ${cash_balance:>13.2f}")
+            if verbose:
+                ledger.append(TRADE_ROW_FMT(txn.transaction_date, 'SELL', symbol_code, txn.quantity, txn.price, amount, running_cash))
 
-    print(f"{'-'*100}\n")
+    if verbose:
+        out.write("".join(ledger))
+        write(f"{'-'*100}\n")
 
     # Calculate current holdings value
-    print(f"\nCURRENT HOLDINGS:")
-    print(f"{'Symbol':<10} {'Quantity':<15} {'Avg Cost':<12} {'Last Close':<12} {'Cost Basis':<15} {'Market Value':<15} {'P/L':<15}")
-    print(f"{'-'*110}")
+    write(f"\nCURRENT HOLDINGS:")
+    write(f"{'Symbol':<10} {'Quantity':<15} {'Avg Cost':<12} {'Last Close':<12} {'Cost Basis':<15} {'Market Value':<15} {'P/L':<15}")
+    write(f"{'-'*110}")
 
     total_holdings_cost = Decimal('0')
     total_holdings_value = Decimal('0')
@@ -109,38 +159,65 @@ def reconcile_portfolio(portfolio_id):
         total_holdings_cost += total_cost
         total_holdings_value += market_value
 
-        print(f"{symbol.symbol:<10} {quantity:>14.4f} ${avg_cost:>10.2f} ${current_price:>10.2f} ${total_cost:>13.2f} ${market_value:>13.2f} ${pl:>13.2f}")
+        write(f"{symbol.symbol:<10} {quantity:>14.4f} ${avg_cost:>10.2f} ${current_price:>10.2f} ${total_cost:>13.2f} ${market_value:>13.2f} ${pl:>13.2f}")
 
-    print(f"{'-'*110}")
-    print(f"{'TOTAL':<10} {'':<15} {'':<12} {'':<12} ${total_holdings_cost:>13.2f} ${total_holdings_value:>13.2f} ${total_holdings_value - total_holdings_cost:>13.2f}")
+    write(f"{'-'*110}")
+    write(f"{'TOTAL':<10} {'':<15} {'':<12} {'':<12} ${total_holdings_cost:>13.2f} ${total_holdings_value:>13.2f} ${total_holdings_value - total_holdings_cost:>13.2f}")
+
+    # Actual holdings value, priced the same way as Portfolio.total_invested(), from the
+    # active holdings fetched once here and reused for the database comparison below
+    db_holdings = list(portfolio.holdings.filter(status='ACTIVE').select_related('symbol'))
+    actual_holdings_value = sum(
+        ((h.symbol.latest_price or Decimal(str(h.symbol.last_close))) * h.quantity for h in db_holdings),
+        Decimal('0')
+    )
+    actual_total_value = portfolio.cash_balance + actual_holdings_value
 
     # Summary
-    print(f"\n{'='*80}")
-    print(f"RECONCILIATION SUMMARY")
-    print(f"{'='*80}")
-    print(f"Expected Cash Balance:        ${cash_balance:>15.2f}")
-    print(f"Expected Holdings Value:      ${total_holdings_value:>15.2f}")
-    print(f"Expected Total Portfolio:     ${cash_balance + total_holdings_value:>15.2f}")
-    print(f"\nActual Portfolio Cash:        ${portfolio.cash_balance:>15.2f}")
-    print(f"Actual Holdings Value:        ${Decimal(str(portfolio.total_invested())):>15.2f}")
-    print(f"Actual Total Portfolio:       ${Decimal(str(portfolio.current_value())):>15.2f}")
-    print(f"\nCash Variance:                ${portfolio.cash_balance - cash_balance:>15.2f}")
-    print(f"Holdings Variance:            ${Decimal(str(portfolio.total_invested())) - total_holdings_value:>15.2f}")
-    print(f"Total Variance:               ${Decimal(str(portfolio.current_value())) - (cash_balance + total_holdings_value):>15.2f}")
-    print(f"{'='*80}\n")
+    write(f"\n{'='*80}")
+    write(f"RECONCILIATION SUMMARY")
+    write(f"{'='*80}")
+    write(f"Expected Cash Balance:        ${cash_balance:>15.2f}")
+    write(f"Expected Holdings Value:      ${total_holdings_value:>15.2f}")
+    write(f"Expected Total Portfolio:     ${cash_balance + total_holdings_value:>15.2f}")
+    write(f"\nActual Portfolio Cash:        ${portfolio.cash_balance:>15.2f}")
+    write(f"Actual Holdings Value:        ${actual_holdings_value:>15.2f}")
+    write(f"Actual Total Portfolio:       ${actual_total_value:>15.2f}")
+    write(f"\nCash Variance:                ${portfolio.cash_balance - cash_balance:>15.2f}")
+    write(f"Holdings Variance:            ${actual_holdings_value - total_holdings_value:>15.2f}")
+    write(f"Total Variance:               ${actual_total_value - (cash_balance + total_holdings_value):>15.2f}")
+    write(f"{'='*80}\n")
 
     # Compare with database holdings
-    print(f"\nDATABASE HOLDINGS (Active):")
-    db_holdings = portfolio.holdings.filter(status='ACTIVE')
-    if db_holdings.exists():
-        print(f"{'Symbol':<10} {'Quantity':<15} {'Avg Cost':<12} {'Cost Basis':<15}")
-        print(f"{'-'*60}")
+    write(f"\nDATABASE HOLDINGS (Active):")
+    if db_holdings:
+        write(f"{'Symbol':<10} {'Quantity':<15} {'Avg Cost':<12} {'Cost Basis':<15}")
+        write(f"{'-'*60}")
         for holding in db_holdings:
-            print(f"{holding.symbol.symbol:<10} {holding.quantity:>14.4f} ${holding.average_cost:>10.2f} ${holding.cost_basis():>13.2f}")
+            write(f"{holding.symbol.symbol:<10} {holding.quantity:>14.4f} ${holding.average_cost:>10.2f} ${holding.cost_basis():>13.2f}")
     else:
-        print("No active holdings in database")
+        write("No active holdings in database")
+
+    write(f"\n{'='*80}\n")
 
-    print(f"\n{'='*80}\n")
+def _reconcile_to_string(portfolio_id, verbose):
+    """Run one reconciliation in a worker thread and return its report"""
+    buf = io.StringIO()
+    try:
+        reconcile_portfolio(portfolio_id, verbose=verbose, out=buf)
+    finally:
+        # Each thread opens its own connection; release it rather than leaking it
+        connection.close()
+    return buf.getvalue()
 
 if __name__ == '__main__':
-    reconcile_portfolio(15)
+    verbose = '--verbose' in sys.argv
+    portfolio_ids = [int(arg) for arg in sys.argv[1:] if arg != '--verbose'] or [15]
+
+    if len(portfolio_ids) == 1:
+        reconcile_portfolio(portfolio_ids[0], verbose=verbose)
+    else:
+        # Portfolios are independent and DB-bound, so reconcile them in parallel and print reports in order
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(portfolio_ids))) as executor:
+            for report in executor.map(_reconcile_to_string, portfolio_ids, [verbose] * len(portfolio_ids)):
+                sys.stdout.write(report)
@@ -62,9 +62,9 @@ def test_holding_operations():
     print()
 
     # Check initial holdings
-    initial_holdings = portfolio.holdings.filter(status="ACTIVE")
-    print(f"Initial active holdings: {initial_holdings.count()}")
-    if initial_holdings.exists():
+    initial_holdings = list(portfolio.holdings.filter(status="ACTIVE").select_related('symbol'))
+    print(f"Initial active holdings: {len(initial_holdings)}")
+    if initial_holdings:
         for h in initial_holdings:
             print(f"  - {h.symbol.symbol}: {h.quantity} shares")
     print()
@@ -85,7 +85,7 @@ def test_holding_operations():
     )
 
     print(f"✓ BUY transaction created: {buy_qty} shares @ ${buy_price}")
-    portfolio.refresh_from_db()
+    portfolio.refresh_from_db(fields=['cash_balance'])
     print(f"  Cash after BUY: ${portfolio.cash_balance}")
 
     # Check holding
@@ -100,8 +100,8 @@ def test_holding_operations():
         print("✗ ERROR: Holding not created!")
 
     # Check log
-    logs = PortfolioHoldingLog.objects.filter(transaction=buy_txn)
-    print(f"✓ Logs created: {logs.count()}")
+    logs = list(PortfolioHoldingLog.objects.filter(transaction=buy_txn))
+    print(f"✓ Logs created: {len(logs)}")
     for log in logs:
         print(f"  - {log.operation}: {log.notes}")
     print()
@@ -122,7 +122,7 @@ def test_holding_operations():
     )
 
     print(f"✓ BUY transaction created: {buy_qty2} shares @ ${buy_price2}")
-    portfolio.refresh_from_db()
+    portfolio.refresh_from_db(fields=['cash_balance'])
     print(f"  Cash after BUY: ${portfolio.cash_balance}")
 
     # Check holding
@@ -143,8 +143,8 @@ def test_holding_operations():
         print("✗ ERROR: Holding not found!")
 
     # Check log
-    logs = PortfolioHoldingLog.objects.filter(transaction=buy_txn2)
-    print(f"✓ Logs created: {logs.count()}")
+    logs = list(PortfolioHoldingLog.objects.filter(transaction=buy_txn2))
+    print(f"✓ Logs created: {len(logs)}")
     for log in logs:
         print(f"  - {log.operation}: {log.notes}")
     print()
@@ -165,7 +165,7 @@ def test_holding_operations():
     )
 
     print(f"✓ SELL transaction created: {sell_qty} shares @ ${sell_price}")
-    portfolio.refresh_from_db()
+    portfolio.refresh_from_db(fields=['cash_balance'])
     print(f"  Cash after SELL: ${portfolio.cash_balance}")
 
     # Check holding
@@ -186,8 +186,8 @@ def test_holding_operations():
         print("✗ ERROR: Holding was deleted (should still exist for partial sell)!")
 
     # Check log
-    logs = PortfolioHoldingLog.objects.filter(transaction=sell_txn)
-    print(f"✓ Logs created: {logs.count()}")
+    logs = list(PortfolioHoldingLog.objects.filter(transaction=sell_txn))
+    print(f"✓ Logs created: {len(logs)}")
     for log in logs:
         print(f"  - {log.operation}: {log.notes}")
     print()
@@ -221,7 +221,7 @@ def test_holding_operations():
     )
 
     print(f"✓ SELL transaction created: {remaining_qty} shares @ ${sell_price2}")
-    portfolio.refresh_from_db()
+    portfolio.refresh_from_db(fields=['cash_balance'])
     print(f"  Cash after SELL: ${portfolio.cash_balance}")
 
     # Check holding - should NOT exist
@@ -237,8 +237,8 @@ def test_holding_operations():
         print("✓ Holding correctly deleted (position fully closed)")
 
     # Check log
-    logs = PortfolioHoldingLog.objects.filter(transaction=sell_txn2)
-    print(f"✓ Logs created: {logs.count()}")
+    logs = list(PortfolioHoldingLog.objects.filter(transaction=sell_txn2))
+    print(f"✓ Logs created: {len(logs)}")
     for log in logs:
         print(f"  - {log.operation}: {log.notes}")
     print()
@@ -259,8 +259,8 @@ def test_holding_operations():
 
     print(f"\nFinal portfolio state:")
     print(f"  Cash: ${portfolio.cash_balance}")
-    active_holdings = portfolio.holdings.filter(status="ACTIVE")
-    print(f"  Active holdings: {active_holdings.count()}")
+    active_holdings = list(portfolio.holdings.filter(status="ACTIVE").select_related('symbol'))
+    print(f"  Active holdings: {len(active_holdings)}")
     for h in active_holdings:
         print(f"    - {h.symbol.symbol}: {h.quantity} shares @ avg ${h.average_cost}")
 
@@ -10,6 +10,8 @@ django.setup()
 from decimal import Decimal
 from zimuabull.models import Portfolio, PortfolioTransaction, TransactionType, Symbol
 from datetime import date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 def test_manual_sell_transaction():
     """Manually create a SELL transaction and see if cash is updated"""
@@ -65,55 +67,37 @@ def trace_transaction_save_path():
     print(f"Portfolio: {portfolio.name}")
     print(f"Cash before: ${cash_before}\n")
 
-    # Temporarily add debugging to the save method
-    import zimuabull.models
-    original_save = zimuabull.models.PortfolioTransaction.save
-
-    def debug_save(self, *args, **kwargs):
-        print(f"[DEBUG] save() called on PortfolioTransaction")
-        print(f"[DEBUG]   transaction_type: {self.transaction_type}")
-        print(f"[DEBUG]   is_new (pk is None): {self.pk is None}")
-        print(f"[DEBUG]   portfolio: {self.portfolio.name}")
-        print(f"[DEBUG]   cash_balance before super().save(): ${self.portfolio.cash_balance}")
-
-        # Call original save
-        result = original_save(self, *args, **kwargs)
-
-        self.portfolio.refresh_from_db()
-        print(f"[DEBUG]   cash_balance after everything: ${self.portfolio.cash_balance}")
-
-        return result
-
-    # Monkey patch
-    zimuabull.models.PortfolioTransaction.save = debug_save
-
-    try:
-        # Create test transaction
-        txn = PortfolioTransaction(
-            portfolio=portfolio,
-            symbol=symbol,
-            transaction_type=TransactionType.SELL,
-            quantity=Decimal("0.1"),
-            price=Decimal("50.00"),
-            transaction_date=date.today(),
-            notes="TEST TRANSACTION - DEBUG TRACE"
-        )
-
-        print("Calling txn.save()...\n")
+    # Create test transaction
+    txn = PortfolioTransaction(
+        portfolio=portfolio,
+        symbol=symbol,
+        transaction_type=TransactionType.SELL,
+        quantity=Decimal("0.1"),
+        price=Decimal("50.00"),
+        transaction_date=date.today(),
+        notes="TEST TRANSACTION - DEBUG TRACE"
+    )
+
+    print(f"[DEBUG] transaction_type: {txn.transaction_type}")
+    print(f"[DEBUG] is_new (pk is None): {txn.pk is None}")
+
+    # Record the SQL issued by save() instead of wrapping the method
+    print("Calling txn.save()...\n")
+    with CaptureQueriesContext(connection) as ctx:
         txn.save()
 
-        portfolio.refresh_from_db()
-        print(f"\n=== RESULT ===")
-        print(f"Cash before: ${cash_before}")
-        print(f"Cash after:  ${portfolio.cash_balance}")
-        print(f"Difference:  ${portfolio.cash_balance - cash_before}")
+    print(f"[DEBUG] save() ran {len(ctx.captured_queries)} queries:")
+    for query in ctx.captured_queries:
+        print(f"[DEBUG]   {query['sql']}")
 
-        # Clean up
-        txn.delete()
+    portfolio.refresh_from_db()
+    print(f"\n=== RESULT ===")
+    print(f"Cash before: ${cash_before}")
+    print(f"Cash after:  ${portfolio.cash_balance}")
+    print(f"Difference:  ${portfolio.cash_balance - cash_before}")
 
-    finally:
-        # Restore original
-        zimuabull.models.PortfolioTransaction.save = original_save
+    # Clean up
+    txn.delete()
 
 if __name__ == "__main__":
     print("TEST 1: Manual SELL Transaction\n")
@@ -15,7 +15,7 @@ import sys
 def view_holding_logs(portfolio_id=None, symbol_symbol=None, operation=None, limit=50):
     """View holding logs with optional filters"""
 
-    logs = PortfolioHoldingLog.objects.all()
+    logs = PortfolioHoldingLog.objects.select_related('symbol')
 
     if portfolio_id:
         logs = logs.filter(portfolio_id=portfolio_id)
@@ -36,13 +36,13 @@ def view_holding_logs(portfolio_id=None, symbol_symbol=None, operation=None, lim
         logs = logs.filter(operation=operation)
         print(f"Filtering by operation: {operation}")
 
-    logs = logs.order_by('-created_at')[:limit]
+    logs = list(logs.order_by('-created_at')[:limit])
 
-    if not logs.exists():
+    if not logs:
         print("No logs found with the specified filters")
         return
 
-    print(f"\nTotal logs found: {logs.count()}\n")
+    print(f"\nTotal logs found: {len(logs)}\n")
     print(f"{'Timestamp':<20} {'Operation':<12} {'Symbol':<8} {'Type':<6} {'Txn Qty':<12} {'Before':<12} {'After':<12} {'Status':<10}")
     print(f"{'-'*120}")
 
@@ -65,11 +65,12 @@ def view_holding_logs(portfolio_id=None, symbol_symbol=None, operation=None, lim
     print(f"{'-'*30}")
 
     from django.db.models import Count
-    summary = PortfolioHoldingLog.objects.values('operation').annotate(count=Count('id')).order_by('-count')
-
+    summary = PortfolioHoldingLog.objects.all()
     if portfolio_id:
         summary = summary.filter(portfolio_id=portfolio_id)
 
+    summary = summary.values('operation').annotate(count=Count('id')).order_by('-count')
+
     for item in summary:
         print(f"{item['operation']:<15} {item['count']:<10}")
 
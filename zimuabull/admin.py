@@ -1,8 +1,67 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
 from .models import DaySymbol, Exchange, IBOrder, PortfolioHoldingLog, Symbol
 
 
+class NoCountPaginator(Paginator):
+    """Paginator that avoids a full SELECT COUNT(*) on large, append-only tables"""
+
+    # Filtered or searched changelists count at most this many rows
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if not queryset.query.where and connection.vendor == "postgresql":
+            # Unfiltered changelist: the planner's row estimate is instant and close enough for paging
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.query.get_meta().db_table],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 (or 0) until the table has been analyzed
+            if row and row[0] > 0:
+                return row[0]
+        return queryset[: self.count_limit].count()
+
+
+class DaySymbolChangeList(ChangeList):
+    """Changelist that loads only the columns DaySymbolAdmin displays"""
+
+    # Symbol.__str__ reads name, symbol and exchange.name
+    only_fields = (
+        "symbol__name",
+        "symbol__symbol",
+        "symbol__exchange__name",
+        "date",
+        "open",
+        "high",
+        "low",
+        "adj_close",
+        "close",
+        "volume",
+        "obv",
+        "obv_signal",
+        "obv_signal_sum",
+        "price_diff",
+        "thirty_price_diff",
+        "thirty_close_trend",
+        "status",
+        "created_at",
+        "updated_at",
+    )
+
+    def get_queryset(self, request, *args, **kwargs):
+        # Applied on the ChangeList's get_queryset so ModelAdmin.get_queryset, which the change form uses, keeps full rows
+        return super().get_queryset(request, *args, **kwargs).only(*self.only_fields)
+
+
 # Register your models here.
 @admin.register(Exchange)
 class ExchangeAdmin(admin.ModelAdmin):
@@ -16,6 +75,7 @@ class SymbolAdmin(admin.ModelAdmin):
     list_display = ("name", "symbol", "exchange", "created_at", "updated_at")
     search_fields = ("name", "symbol", "exchange__name")
     list_filter = ("exchange__country",)
+    list_select_related = ("exchange",)
 
 
 @admin.register(DaySymbol)
@@ -41,6 +101,14 @@ class DaySymbolAdmin(admin.ModelAdmin):
     )
     search_fields = ("symbol__name", "date")
     list_filter = ("status",)
+    list_select_related = ("symbol__exchange",)
+    paginator = NoCountPaginator
+    show_full_result_count = False
+    ordering = ("-date", "symbol")
+    raw_id_fields = ("symbol",)
+
+    def get_changelist(self, request, **kwargs):
+        return DaySymbolChangeList
 
 
 @admin.register(PortfolioHoldingLog)
@@ -58,6 +126,10 @@ class PortfolioHoldingLogAdmin(admin.ModelAdmin):
         "holding_status",
     )
     list_filter = ("operation", "transaction_type", "holding_status", "portfolio")
+    # Portfolio.__str__ reads user and exchange, Symbol.__str__ reads exchange
+    list_select_related = ("portfolio__user", "portfolio__exchange", "symbol__exchange")
+    paginator = NoCountPaginator
+    show_full_result_count = False
     search_fields = ("symbol__symbol", "portfolio__name", "notes")
     readonly_fields = (
         "portfolio",
@@ -78,6 +150,17 @@ class PortfolioHoldingLogAdmin(admin.ModelAdmin):
     )
     ordering = ("-created_at",)
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # Only the read-only change form renders transaction (whose __str__ reads its symbol);
+        # the changelist keeps to list_select_related
+        match = request.resolver_match
+        if match and (match.url_name or "").endswith("_change"):
+            queryset = queryset.select_related(
+                "portfolio__user", "portfolio__exchange", "symbol__exchange", "transaction__symbol"
+            )
+        return queryset
+
     def has_add_permission(self, request):
         # Logs should only be created by the system
         return False
@@ -102,7 +185,12 @@ class IBOrderAdmin(admin.ModelAdmin):
         "filled_at",
     )
     list_filter = ("status", "action", "order_type", "portfolio")
+    list_select_related = ("portfolio__user", "portfolio__exchange", "symbol__exchange")
+    paginator = NoCountPaginator
+    show_full_result_count = False
     search_fields = ("client_order_id", "ib_order_id", "symbol__symbol", "portfolio__name")
+    # Plain id inputs instead of <select>s that would load every symbol, portfolio and position
+    raw_id_fields = ("portfolio", "day_trade_position", "symbol")
     readonly_fields = (
         "client_order_id",
         "ib_order_id",
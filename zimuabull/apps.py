@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",  # Readers no longer block on Celery writes
+    "PRAGMA synchronous=NORMAL;",  # Safe with WAL, avoids an fsync per commit
+    "PRAGMA mmap_size=268435456;",  # 256 MB memory-mapped I/O
+    "PRAGMA cache_size=-64000;",  # 64 MB page cache
+    "PRAGMA temp_store=MEMORY;",
+)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply performance pragmas to every new SQLite connection"""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
 
 
 class ZimuabullConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "zimuabull"
+
+    def ready(self):
+        connection_created.connect(configure_sqlite, dispatch_uid="zimuabull_configure_sqlite")
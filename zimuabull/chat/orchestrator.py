@@ -1,15 +1,33 @@
+import asyncio
+import hashlib
 import json
 import logging
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any
 
 from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
 
-from openai import OpenAI, OpenAIError
+from asgiref.sync import sync_to_async
+from openai import AsyncOpenAI, OpenAI, OpenAIError
 
-from .tools import ChatToolset, ToolExecutionError, aggregate_tool_results
+from .serialization import dumps, loads
+from .tools import TOOL_SPECS, ChatToolset, ToolExecutionError, aggregate_tool_results
 
 logger = logging.getLogger(__name__)
 
+# Most recent conversation messages replayed to the model each turn
+MAX_HISTORY_MESSAGES = 20
+
+# Tool results replayed to the model are compacted to bound prompt tokens; clients still get the full result
+MAX_TOOL_LIST_ITEMS = 20
+MAX_TOOL_CONTENT_CHARS = 8000
+
+# Upper bound on tool calls executed in parallel (each worker holds its own DB connection)
+MAX_TOOL_WORKERS = 8
+
 SYSTEM_PROMPT = """You are ZimuaBull AI, a professional investment assistant.
 
 Capabilities:
@@ -28,15 +46,315 @@ Guidelines:
 - Format every assistant reply in valid Markdown. Use headings, bullet lists, and tables where they improve readability. Inline data with backticks when referencing symbols, indicators, or numeric metrics. Do not return plain text outside Markdown formatting.
 """
 
+# Shared by every request; messages lists hold a reference and never mutate it
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def _compact_tool_value(value: Any) -> Any:
+    """Shorten long lists (price history, trade logs) to their first and last items."""
+    if isinstance(value, dict):
+        return {key: _compact_tool_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if len(value) <= MAX_TOOL_LIST_ITEMS:
+            return [_compact_tool_value(item) for item in value]
+        half = MAX_TOOL_LIST_ITEMS // 2
+        return {
+            "count": len(value),
+            "first": [_compact_tool_value(item) for item in value[:half]],
+            "last": [_compact_tool_value(item) for item in value[-half:]],
+        }
+    return value
+
+
+def _tool_message_content(tool_name: str, result: Any) -> str:
+    """Serialise a tool result for the model's tool message, within MAX_TOOL_CONTENT_CHARS."""
+    content = dumps(_compact_tool_value(result))
+    logger.debug("Tool %s result: %d chars sent to model", tool_name, len(content))
+    if len(content) > MAX_TOOL_CONTENT_CHARS:
+        logger.info("Tool %s result truncated from %d chars", tool_name, len(content))
+        omitted = len(content) - MAX_TOOL_CONTENT_CHARS
+        content = f"{content[:MAX_TOOL_CONTENT_CHARS]}...[truncated {omitted} chars]"
+    return content
+
+
+class _CompletionAccumulator:
+    """Assemble a streamed completion's content and tool calls from its chunks."""
+
+    def __init__(self):
+        self.content_parts: list[str] = []
+        self.calls: dict[int, dict[str, Any]] = {}
+
+    def feed(self, chunk) -> str | None:
+        """Consume one chunk, returning its content delta if it carries one."""
+        if chunk.usage:
+            # Cached tokens show whether the stable system/tools/history prefix hit OpenAI's prompt cache
+            details = getattr(chunk.usage, "prompt_tokens_details", None)
+            logger.debug(
+                "OpenAI usage: prompt=%s cached=%s completion=%s",
+                chunk.usage.prompt_tokens,
+                getattr(details, "cached_tokens", None),
+                chunk.usage.completion_tokens,
+            )
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta
+
+        # Tool calls arrive as per-index id/name/argument fragments
+        for call in delta.tool_calls or []:
+            entry = self.calls.setdefault(call.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            if call.id:
+                entry["id"] = call.id
+            if call.type:
+                entry["type"] = call.type
+            if call.function:
+                if call.function.name:
+                    entry["function"]["name"] += call.function.name
+                if call.function.arguments:
+                    entry["function"]["arguments"] += call.function.arguments
+
+        if delta.content:
+            self.content_parts.append(delta.content)
+        return delta.content or None
+
+    @property
+    def content(self) -> str | None:
+        return "".join(self.content_parts) if self.content_parts else None
+
+    @property
+    def tool_calls(self) -> list[dict[str, Any]]:
+        return [self.calls[index] for index in sorted(self.calls)]
+
+
+ToolOutcome = tuple[dict[str, Any], Any, ToolExecutionError | None]
+
+
+def _tool_key(tool_call: dict[str, Any]) -> tuple[str, str]:
+    """Memo key for a tool call: its name and canonical arguments (every tool is a read-only lookup)."""
+    tool_name = tool_call["function"]["name"]
+    raw_arguments = tool_call["function"]["arguments"] or "{}"
+    try:
+        return tool_name, dumps(loads(raw_arguments), sort_keys=True)
+    except json.JSONDecodeError:
+        return tool_name, raw_arguments
+
+
+def _pending_tool_calls(keys: list[tuple[str, str]], tool_calls: list[dict[str, Any]], memo: dict) -> dict[tuple[str, str], dict[str, Any]]:
+    """First call for each key not already answered by the memo; only these need executing."""
+    pending: dict[tuple[str, str], dict[str, Any]] = {}
+    for key, tool_call in zip(keys, tool_calls, strict=True):
+        if key not in memo:
+            pending.setdefault(key, tool_call)
+    return pending
+
+
+def _reply_cache_key(user, conversation, last_reply_id: int | None, user_message: str, context: dict[str, Any]) -> str:
+    """Exact-match key: same user, conversation, latest reply and context, message compared case- and whitespace-insensitively.
+
+    Keying on the conversation's newest assistant message means any completed
+    turn since invalidates the entry; only a repeat with no answer in between
+    (a retried or double-submitted question) can be served from the cache.
+    """
+    normalized = " ".join(user_message.lower().split())
+    payload = dumps([user.id, conversation.id, last_reply_id, normalized, context], sort_keys=True)
+    return f"reply:{hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()}"
+
+
+def _tool_status(tool_name: str, exec_err: ToolExecutionError | None) -> str:
+    return f"Executed tool {tool_name}" if exec_err is None else f"Tool {tool_name} failed: {exec_err}"
+
 
 class ChatOrchestrator:
+    INITIAL_FAILURE_REPLY = "I ran into an issue reaching the analysis engine. Please try again shortly."
+    TOOL_FAILURE_REPLY = "I encountered a problem while processing the analysis. Please try again."
+
     def __init__(self):
         if not settings.OPENAI_API_KEY:
             msg = "OPENAI_API_KEY is not configured."
             raise RuntimeError(msg)
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # The SDK retries transient failures itself, so a rate limit does not cost the user the whole turn
+        self.client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=settings.OPENAI_MAX_RETRIES)
+        self.async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=settings.OPENAI_MAX_RETRIES)
         self.model = settings.OPENAI_MODEL
 
+    @staticmethod
+    def _build_messages(
+        conversation, user_message: str, context: dict[str, Any], user_message_id: int | None = None
+    ) -> tuple[list[dict[str, Any]], int | None]:
+        """Prompt messages for this turn, plus the id of the newest assistant reply in the history window."""
+        messages = [SYSTEM_MESSAGE]
+
+        # Newest window only, fetched as plain dicts and restored to chronological order.
+        # The saved copy of the message being answered is skipped; it is appended below.
+        history = conversation.messages.all()
+        if user_message_id is not None:
+            history = history.exclude(pk=user_message_id)
+        # id breaks ties between rows saved within the same timestamp
+        history = list(history.order_by("-created_at", "-id").values("id", "role", "content")[:MAX_HISTORY_MESSAGES])
+        last_reply_id = next((row["id"] for row in history if row["role"] == "assistant"), None)
+        messages.extend({"role": row["role"], "content": row["content"]} for row in reversed(history))
+
+        if context:
+            messages.append({"role": "system", "content": f"Context hints: {dumps(context)}"})
+
+        messages.append({"role": "user", "content": user_message})
+        return messages, last_reply_id
+
+    @staticmethod
+    def _run_tool_call(toolset: ChatToolset, tool_call: dict[str, Any]) -> ToolOutcome:
+        """Decode and execute one tool call, returning (arguments, result, error)."""
+        tool_name = tool_call["function"]["name"]
+        try:
+            arguments = loads(tool_call["function"]["arguments"] or "{}")
+        except json.JSONDecodeError:
+            arguments = {}
+
+        try:
+            return arguments, toolset.execute(tool_name, arguments), None
+        except ToolExecutionError as exec_err:
+            logger.warning("Tool %s failed: %s", tool_name, exec_err)
+            return arguments, None, exec_err
+
+    @classmethod
+    def _run_tool_call_in_worker(cls, toolset: ChatToolset, tool_call: dict[str, Any]) -> ToolOutcome:
+        try:
+            return cls._run_tool_call(toolset, tool_call)
+        finally:
+            # Each worker thread opens its own connection; release it rather than leaking it
+            connection.close()
+
+    def _execute_tool_calls(
+        self,
+        toolset: ChatToolset,
+        tool_calls: list[dict[str, Any]],
+        memo: dict[tuple[str, str], ToolOutcome],
+        status_updates: list[str],
+        status_callback: Any | None = None,
+    ) -> list[ToolOutcome]:
+        """Execute a turn's tool calls, concurrently when there are several.
+
+        Calls repeating an earlier one (in this turn or a previous turn of the
+        same run) reuse its outcome from ``memo``. Status updates are reported
+        as each call finishes; outcomes are returned in the order of ``tool_calls``.
+        """
+
+        def report(tool_name: str, outcome: ToolOutcome) -> None:
+            update = _tool_status(tool_name, outcome[2])
+            status_updates.append(update)
+            if status_callback:
+                try:
+                    status_callback(update)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Status callback failed for tool %s", tool_name)
+
+        keys = [_tool_key(tool_call) for tool_call in tool_calls]
+        pending = _pending_tool_calls(keys, tool_calls, memo)
+
+        if len(pending) == 1:
+            ((key, tool_call),) = pending.items()
+            memo[key] = self._run_tool_call(toolset, tool_call)
+            report(tool_call["function"]["name"], memo[key])
+        elif pending:
+            # Tools are ORM-bound, so threads overlap their database waits
+            with ThreadPoolExecutor(max_workers=min(len(pending), MAX_TOOL_WORKERS)) as executor:
+                futures = {
+                    executor.submit(self._run_tool_call_in_worker, toolset, tool_call): key
+                    for key, tool_call in pending.items()
+                }
+                for future in as_completed(futures):
+                    key = futures[future]
+                    memo[key] = future.result()
+                    report(pending[key]["function"]["name"], memo[key])
+
+        for key, tool_call in zip(keys, tool_calls, strict=True):
+            if pending.get(key) is not tool_call:
+                report(tool_call["function"]["name"], memo[key])
+
+        return [memo[key] for key in keys]
+
+    async def _aexecute_tool_calls(
+        self, toolset: ChatToolset, pending: dict[tuple[str, str], dict[str, Any]]
+    ) -> AsyncIterator[tuple[tuple[str, str], ToolOutcome]]:
+        """Run tool calls on worker threads, yielding (key, outcome) as each finishes."""
+        limit = asyncio.Semaphore(MAX_TOOL_WORKERS)
+        run_in_worker = sync_to_async(self._run_tool_call_in_worker, thread_sensitive=False)
+
+        async def run(key: tuple[str, str], tool_call: dict[str, Any]):
+            async with limit:
+                return key, await run_in_worker(toolset, tool_call)
+
+        for finished in asyncio.as_completed([run(key, tool_call) for key, tool_call in pending.items()]):
+            yield await finished
+
+    @staticmethod
+    def _append_tool_outcomes(
+        messages: list[dict[str, Any]],
+        tool_results: list[dict[str, Any]],
+        tool_calls: list[dict[str, Any]],
+        outcomes: list[ToolOutcome],
+    ) -> None:
+        # Log assistant tool request
+        messages.append(
+            {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": tool_calls,
+            }
+        )
+
+        # Tool responses must follow the order of the assistant's tool_calls
+        for tool_call, (arguments, result, exec_err) in zip(tool_calls, outcomes, strict=True):
+            tool_name = tool_call["function"]["name"]
+            if exec_err is None:
+                tool_results.append({"tool": tool_name, "arguments": arguments, "result": result})
+                tool_content = _tool_message_content(tool_name, result)
+            else:
+                error_payload = {"error": str(exec_err), "tool": tool_name}
+                tool_content = dumps(error_payload)
+                tool_results.append({"tool": tool_name, "arguments": arguments, "result": error_payload})
+
+            messages.append(
+                {
+                    "role": "tool",
+                    "content": tool_content,
+                    "tool_call_id": tool_call["id"],
+                }
+            )
+
+    @staticmethod
+    def _failure_result(reply: str, exc: OpenAIError, status_updates: list[str], tool_results: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
+            "reply": reply,
+            "analysis": {"symbols": [], "comparisons": [], "portfolios": [], "scenarios": [], "backtests": [], "simulations": [], "warnings": [str(exc)]},
+            "messages": [],
+            "status_updates": status_updates,
+            "tool_results": tool_results,
+        }
+
+    @staticmethod
+    def _final_result(content: str | None, status_updates: list[str], tool_results: list[dict[str, Any]]) -> dict[str, Any]:
+        return {
+            "reply": content or "",
+            "analysis": aggregate_tool_results([tr["result"] for tr in tool_results if isinstance(tr.get("result"), dict)]),
+            "status_updates": status_updates,
+            "tool_results": tool_results,
+        }
+
+    # Reply cache: failures are logged and treated as misses so chat keeps working without Redis
+    @staticmethod
+    def _cache_get(key: str) -> dict[str, Any] | None:
+        try:
+            return caches["chat"].get(key)
+        except Exception:  # pylint: disable=broad-except
+            logger.warning("Chat reply cache lookup failed", exc_info=True)
+            return None
+
+    @staticmethod
+    def _cache_set(key: str, result: dict[str, Any]) -> None:
+        try:
+            caches["chat"].set(key, result, settings.CHAT_REPLY_CACHE_TIMEOUT)
+        except Exception:  # pylint: disable=broad-except
+            logger.warning("Chat reply cache store failed", exc_info=True)
+
     def run(
         self,
         user,
@@ -44,125 +362,125 @@ class ChatOrchestrator:
         user_message: str,
         context: dict[str, Any] | None = None,
         status_callback: Any | None = None,
+        *,
+        user_message_id: int | None = None,
     ) -> dict[str, Any]:
         context = context or {}
+        messages, last_reply_id = self._build_messages(conversation, user_message, context, user_message_id)
+        cache_key = _reply_cache_key(user, conversation, last_reply_id, user_message, context)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         toolset = ChatToolset(user=user)
         tool_results: list[dict[str, Any]] = []
         status_updates: list[str] = []
+        tool_memo: dict[tuple[str, str], ToolOutcome] = {}
 
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        # Follow-up requests after tool calls leave tool_choice at its default
+        request = {"model": self.model, "messages": messages, "tools": TOOL_SPECS, "tool_choice": "auto"}
+        failure_reply = self.INITIAL_FAILURE_REPLY
 
-        for msg in conversation.messages.order_by("created_at"):
-            messages.append({"role": msg.role, "content": msg.content})
+        while True:
+            completion = _CompletionAccumulator()
+            try:
+                for chunk in self.client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **request):
+                    completion.feed(chunk)
+            except OpenAIError as exc:
+                logger.exception("OpenAI completion failed")
+                return self._failure_result(failure_reply, exc, status_updates, tool_results)
 
-        if context:
-            messages.append({"role": "system", "content": f"Context hints: {json.dumps(context)}"})
+            tool_calls = completion.tool_calls
+            if not tool_calls:
+                result = self._final_result(completion.content, status_updates, tool_results)
+                self._cache_set(cache_key, result)
+                return result
 
-        messages.append({"role": "user", "content": user_message})
+            outcomes = self._execute_tool_calls(toolset, tool_calls, tool_memo, status_updates, status_callback)
+            self._append_tool_outcomes(messages, tool_results, tool_calls, outcomes)
 
-        openai_tools = toolset.tool_specs()
+            request = {"model": self.model, "messages": messages, "tools": TOOL_SPECS}
+            failure_reply = self.TOOL_FAILURE_REPLY
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=openai_tools,
-                tool_choice="auto",
-            )
-        except OpenAIError as exc:
-            logger.exception("OpenAI initial completion failed")
-            return {
-                "reply": "I ran into an issue reaching the analysis engine. Please try again shortly.",
-                "analysis": {"symbols": [], "comparisons": [], "portfolios": [], "scenarios": [], "backtests": [], "simulations": [], "warnings": [str(exc)]},
-                "messages": [],
-                "status_updates": status_updates,
-                "tool_results": [],
-            }
+    async def arun(
+        self,
+        user,
+        conversation,
+        user_message: str,
+        context: dict[str, Any] | None = None,
+        *,
+        user_message_id: int | None = None,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Async counterpart of ``run`` for streaming responses.
+
+        Yields ``("token", delta)`` as reply text arrives, ``("status", message)``
+        as tools finish, and finally ``("final", result)`` with the same result
+        dict ``run`` returns. Text streamed in a turn that turns out to call
+        tools (or fails) is not part of the reply, so ``("reset", None)`` tells
+        the consumer to discard the tokens received so far. OpenAI I/O stays on
+        the event loop; only ORM work is handed to threads.
+        """
+        context = context or {}
+        messages, last_reply_id = await sync_to_async(self._build_messages)(conversation, user_message, context, user_message_id)
+        cache_key = _reply_cache_key(user, conversation, last_reply_id, user_message, context)
+        cached = await sync_to_async(self._cache_get)(cache_key)
+        if cached is not None:
+            yield "final", cached
+            return
+
+        toolset = ChatToolset(user=user)
+        tool_results: list[dict[str, Any]] = []
+        status_updates: list[str] = []
+        tool_memo: dict[tuple[str, str], ToolOutcome] = {}
+
+        # Follow-up requests after tool calls leave tool_choice at its default
+        request = {"model": self.model, "messages": messages, "tools": TOOL_SPECS, "tool_choice": "auto"}
+        failure_reply = self.INITIAL_FAILURE_REPLY
 
         while True:
-            choice = response.choices[0]
-            message = choice.message
-
-            if message and getattr(message, "tool_calls", None):
-                # Log assistant tool request
-                messages.append(
-                    {
-                        "role": "assistant",
-                        "content": None,
-                        "tool_calls": [
-                            {
-                                "id": tool_call.id,
-                                "type": tool_call.type,
-                                "function": {
-                                    "name": tool_call.function.name,
-                                    "arguments": tool_call.function.arguments,
-                                },
-                            }
-                            for tool_call in message.tool_calls
-                        ],
-                    }
-                )
-
-                for tool_call in message.tool_calls:
-                    tool_name = tool_call.function.name
-                    try:
-                        arguments = json.loads(tool_call.function.arguments or "{}")
-                    except json.JSONDecodeError:
-                        arguments = {}
-
-                    try:
-                        result = toolset.execute(tool_name, arguments)
-                        status_updates.append(f"Executed tool {tool_name}")
-                        if status_callback:
-                            try:
-                                status_callback(f"Executed tool {tool_name}")
-                            except Exception:  # pylint: disable=broad-except
-                                logger.exception("Status callback failed for tool %s", tool_name)
-                        tool_results.append({"tool": tool_name, "arguments": arguments, "result": result})
-                        tool_content = json.dumps(result)
-                    except ToolExecutionError as exec_err:
-                        logger.warning("Tool %s failed: %s", tool_name, exec_err)
-                        error_payload = {"error": str(exec_err), "tool": tool_name}
-                        tool_content = json.dumps(error_payload)
-                        tool_results.append({"tool": tool_name, "arguments": arguments, "result": error_payload})
-                        status_updates.append(f"Tool {tool_name} failed: {exec_err}")
-                        if status_callback:
-                            try:
-                                status_callback(f"Tool {tool_name} failed: {exec_err}")
-                            except Exception:  # pylint: disable=broad-except
-                                logger.exception("Status callback failed during tool error for %s", tool_name)
-
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "content": tool_content,
-                            "tool_call_id": tool_call.id,
-                        }
-                    )
+            completion = _CompletionAccumulator()
+            streamed = False
+            try:
+                stream = await self.async_client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **request)
+                async for chunk in stream:
+                    delta = completion.feed(chunk)
+                    if completion.calls:
+                        # A tool turn: its text never reaches the final reply, so retract it and stream no more
+                        if streamed:
+                            streamed = False
+                            yield "reset", None
+                    elif delta:
+                        streamed = True
+                        yield "token", delta
+            except OpenAIError as exc:
+                logger.exception("OpenAI completion failed")
+                if streamed:
+                    yield "reset", None
+                yield "final", self._failure_result(failure_reply, exc, status_updates, tool_results)
+                return
 
-                try:
-                    response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=messages,
-                        tools=openai_tools,
-                    )
-                    continue
-                except OpenAIError as exc:
-                    logger.exception("OpenAI completion failed after tool call")
-                    return {
-                        "reply": "I encountered a problem while processing the analysis. Please try again.",
-                        "analysis": {"symbols": [], "comparisons": [], "portfolios": [], "scenarios": [], "backtests": [], "simulations": [], "warnings": [str(exc)]},
-                        "messages": [],
-                        "status_updates": status_updates,
-                        "tool_results": tool_results,
-                    }
-
-            assistant_reply = message.content if message else ""
-            analysis = aggregate_tool_results([tr["result"] for tr in tool_results if isinstance(tr.get("result"), dict)])
-
-            return {
-                "reply": assistant_reply,
-                "analysis": analysis,
-                "status_updates": status_updates,
-                "tool_results": tool_results,
-            }
+            tool_calls = completion.tool_calls
+            if not tool_calls:
+                result = self._final_result(completion.content, status_updates, tool_results)
+                await sync_to_async(self._cache_set)(cache_key, result)
+                yield "final", result
+                return
+
+            keys = [_tool_key(tool_call) for tool_call in tool_calls]
+            pending = _pending_tool_calls(keys, tool_calls, tool_memo)
+            async for key, outcome in self._aexecute_tool_calls(toolset, pending):
+                tool_memo[key] = outcome
+                update = _tool_status(pending[key]["function"]["name"], outcome[2])
+                status_updates.append(update)
+                yield "status", update
+            # Repeated calls reuse the stored outcome
+            for key, tool_call in zip(keys, tool_calls, strict=True):
+                if pending.get(key) is not tool_call:
+                    update = _tool_status(tool_call["function"]["name"], tool_memo[key][2])
+                    status_updates.append(update)
+                    yield "status", update
+            outcomes = [tool_memo[key] for key in keys]
+            self._append_tool_outcomes(messages, tool_results, tool_calls, outcomes)
+
+            request = {"model": self.model, "messages": messages, "tools": TOOL_SPECS}
+            failure_reply = self.TOOL_FAILURE_REPLY
@@ -0,0 +1,20 @@
+"""JSON encoding for the chat hot path (tool arguments/results and SSE frames)."""
+
+from typing import Any
+
+import orjson
+
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers keep catching the stdlib type
+loads = orjson.loads
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    option = _DUMPS_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _DUMPS_OPTIONS
+    return orjson.dumps(obj, option=option).decode()
+
+
+def dumpb(obj: Any) -> bytes:
+    """Encode straight to UTF-8 bytes for callers that write to the wire (SSE frames)."""
+    return orjson.dumps(obj, option=_DUMPS_OPTIONS)
@@ -1,5 +1,3 @@
-import asyncio
-import json
 from collections.abc import AsyncGenerator
 from typing import Any
 
@@ -9,68 +7,65 @@ from asgiref.sync import sync_to_async
 
 from zimuabull.models import ConversationMessage
 
+from .serialization import dumpb
 
-async def sse_event_stream(orchestrator, user, conversation, message: str, context: dict[str, Any]) -> AsyncGenerator[str]:
-    """Async generator yielding SSE-formatted chunks with live updates."""
-
-    loop = asyncio.get_running_loop()
-    status_queue: asyncio.Queue[str] = asyncio.Queue()
+# Constant frames, encoded once rather than per request
+STARTED_FRAME = b'data: {"status":"started"}\n\n'
+RESET_FRAME = b'data: {"reset":true}\n\n'
+END_FRAME = b"event: end\ndata: {}\n\n"
 
-    def status_callback(msg: str) -> None:
-        try:
-            asyncio.run_coroutine_threadsafe(status_queue.put(msg), loop)
-        except RuntimeError:
-            # Loop may be closed; ignore since stream is ending
-            pass
 
-    yield 'data: {"status": "started"}\n\n'
+def _frame(payload: dict[str, Any]) -> bytes:
+    return b"data: " + dumpb(payload) + b"\n\n"
 
-    async def run_orchestrator():
-        result = await sync_to_async(orchestrator.run)(user, conversation, message, context, status_callback=status_callback)
-        await sync_to_async(ConversationMessage.objects.create)(
-            conversation=conversation,
-            role="assistant",
-            content=result.get("reply", ""),
-            context_data={
-                "analysis": result.get("analysis", {}),
-                "status_updates": result.get("status_updates", []),
-                "tool_results": result.get("tool_results", []),
-            },
-        )
-        await status_queue.put(json.dumps({
-            "type": "final",
-            "reply": result.get("reply"),
-            "analysis": result.get("analysis", {}),
-            "status_updates": result.get("status_updates", []),
-            "tool_results": result.get("tool_results", []),
-        }))
-        await status_queue.put("__end__")
 
-    task = asyncio.create_task(run_orchestrator())
+async def sse_event_stream(
+    orchestrator, user, conversation, message: str, context: dict[str, Any], *, user_message_id: int | None = None
+) -> AsyncGenerator[bytes]:
+    """Async generator yielding SSE-formatted chunks with live updates."""
 
-    while True:
-        update = await status_queue.get()
-        if update == "__end__":
-            break
-        try:
-            payload = json.loads(update)
-            if payload.get("type") == "final":
-                yield f"data: {json.dumps(payload)}\n\n"
-            else:
-                yield f"data: {json.dumps({'status': payload})}\n\n"
-        except json.JSONDecodeError:
-            yield f"data: {json.dumps({'status': update})}\n\n"
+    yield STARTED_FRAME
 
-    await task
-    yield "event: end\ndata: {}\n\n"
+    result: dict[str, Any] = {}
+    async for kind, payload in orchestrator.arun(user, conversation, message, context, user_message_id=user_message_id):
+        if kind == "final":
+            result = payload
+        elif kind == "token":
+            yield _frame({"token": payload})
+        elif kind == "reset":
+            yield RESET_FRAME
+        else:
+            yield _frame({"status": payload})
 
+    await sync_to_async(ConversationMessage.objects.create)(
+        conversation=conversation,
+        role="assistant",
+        content=result.get("reply", ""),
+        context_data={
+            "analysis": result.get("analysis", {}),
+            "status_updates": result.get("status_updates", []),
+            "tool_results": result.get("tool_results", []),
+        },
+    )
+    final = {
+        "type": "final",
+        "reply": result.get("reply"),
+        "analysis": result.get("analysis", {}),
+        "status_updates": result.get("status_updates", []),
+        "tool_results": result.get("tool_results", []),
+    }
+    yield _frame(final)
+    yield END_FRAME
 
-def sse_response(orchestrator, user, conversation, message: str, context: dict[str, Any]) -> StreamingHttpResponse:
-    async def async_stream():
-        async for chunk in sse_event_stream(orchestrator, user, conversation, message, context):
-            yield chunk
 
-    response = StreamingHttpResponse(async_stream(), content_type="text/event-stream")
+def sse_response(
+    orchestrator, user, conversation, message: str, context: dict[str, Any], *, user_message_id: int | None = None
+) -> StreamingHttpResponse:
+    # StreamingHttpResponse consumes async iterators of bytes directly, without re-encoding
+    response = StreamingHttpResponse(
+        sse_event_stream(orchestrator, user, conversation, message, context, user_message_id=user_message_id),
+        content_type="text/event-stream",
+    )
     response["Cache-Control"] = "no-cache"
     response["X-Accel-Buffering"] = "no"
     return response
@@ -1,41 +1,90 @@
+from collections.abc import Sequence
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
 from typing import Any
 
+from django.db.models import Max, Min, Prefetch
+from django.db.models.functions import Upper
 from django.utils import timezone
 
+import numpy as np
 import pandas as pd
 
-from zimuabull.models import DaySymbol, Portfolio, PortfolioHolding, Symbol
+from zimuabull.models import DayPrediction, DaySymbol, Portfolio, PortfolioHolding, Symbol
+
+HISTORY_FIELDS = ("date", "open", "high", "low", "close", "volume", "rsi", "macd", "macd_signal", "macd_histogram")
 
 
 class ToolExecutionError(Exception):
     """Raised when a tool execution cannot be completed."""
 
 
+def _latest_prediction_prefetch() -> Prefetch:
+    """Attach each symbol's newest DayPrediction as ``latest_predictions`` (a 0/1 item list)."""
+    return Prefetch("dayprediction_set", queryset=DayPrediction.objects.order_by("-date")[:1], to_attr="latest_predictions")
+
+
 def _resolve_symbol(symbol_code: str, exchange_code: str | None = None) -> tuple[Symbol, list[str]]:
-    qs = Symbol.objects.filter(symbol__iexact=symbol_code)
+    qs = Symbol.objects.filter(symbol__iexact=symbol_code).select_related("exchange")
     warnings: list[str] = []
 
     if exchange_code:
         qs = qs.filter(exchange__code__iexact=exchange_code)
 
-    if not qs.exists():
+    # Two rows are enough to tell a unique match from an ambiguous one
+    rows = list(qs.order_by("-last_volume", "-accuracy", "-updated_at")[:2])
+
+    if not rows:
         raise ToolExecutionError(f"Symbol {symbol_code} not found" + (f" on {exchange_code}" if exchange_code else ""))
 
-    if qs.count() > 1:
-        qs = qs.order_by("-last_volume", "-accuracy", "-updated_at")
-        top = qs.first()
-        warnings.append(
-            f"Symbol {symbol_code.upper()} exists on multiple exchanges; using {top.exchange.code}. "
-            "Include an exchange code to override."
-        )
-        return top, warnings
+    if len(rows) > 1:
+        warnings.append(_ambiguous_symbol_warning(symbol_code, rows[0]))
 
-    return qs.first(), warnings
+    return rows[0], warnings
 
 
-def _price_history(symbol: Symbol, start: date | None = None, end: date | None = None, lookback_days: int | None = 90) -> list[dict[str, Any]]:
+def _resolve_symbols(entries: list[dict[str, Any]]) -> tuple[list[Symbol], list[str]]:
+    """Resolve several {"symbol", "exchange"} entries with a single query, in order."""
+    codes = {(entry.get("symbol") or "").upper() for entry in entries}
+    candidates: dict[str, list[Symbol]] = {}
+    for sym in (
+        Symbol.objects.annotate(symbol_upper=Upper("symbol"))
+        .filter(symbol_upper__in=codes)
+        .select_related("exchange")
+        .prefetch_related(_latest_prediction_prefetch())
+        .order_by("-last_volume", "-accuracy", "-updated_at")
+    ):
+        candidates.setdefault(sym.symbol_upper, []).append(sym)
+
+    resolved: list[Symbol] = []
+    warnings: list[str] = []
+    for entry in entries:
+        symbol_code = entry.get("symbol") or ""
+        exchange_code = entry.get("exchange")
+        matches = candidates.get(symbol_code.upper(), [])
+        if exchange_code:
+            matches = [sym for sym in matches if sym.exchange.code.upper() == exchange_code.upper()]
+
+        if not matches:
+            raise ToolExecutionError(f"Symbol {symbol_code} not found" + (f" on {exchange_code}" if exchange_code else ""))
+
+        if len(matches) > 1:
+            warnings.append(_ambiguous_symbol_warning(symbol_code, matches[0]))
+        resolved.append(matches[0])
+
+    return resolved, warnings
+
+
+def _ambiguous_symbol_warning(symbol_code: str, chosen: Symbol) -> str:
+    return (
+        f"Symbol {symbol_code.upper()} exists on multiple exchanges; using {chosen.exchange.code}. "
+        "Include an exchange code to override."
+    )
+
+
+def _history_window(start: date | None, end: date | None, lookback_days: int | None) -> tuple[date, date]:
     if start and end is None:
         end = start
 
@@ -47,29 +96,67 @@ def _price_history(symbol: Symbol, start: date | None = None, end: date | None =
             lookback_days = 90
         start = end - timedelta(days=lookback_days * 2)
 
+    return start, end
+
+
+def _history_row(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "date": row["date"].isoformat(),
+        "open": round(row["open"], 2),
+        "high": round(row["high"], 2),
+        "low": round(row["low"], 2),
+        "close": round(row["close"], 2),
+        "volume": int(row["volume"]),
+        "rsi": round(row["rsi"], 2) if row["rsi"] is not None else None,
+        "macd": round(row["macd"], 4) if row["macd"] is not None else None,
+        "macd_signal": round(row["macd_signal"], 4) if row["macd_signal"] is not None else None,
+        "macd_histogram": round(row["macd_histogram"], 4) if row["macd_histogram"] is not None else None,
+    }
+
+
+def _price_history(symbol: Symbol, start: date | None = None, end: date | None = None, lookback_days: int | None = 90) -> list[dict[str, Any]]:
+    start, end = _history_window(start, end, lookback_days)
+    qs = DaySymbol.objects.filter(symbol=symbol, date__gte=start, date__lte=end).order_by("date").values(*HISTORY_FIELDS)
+    return [_history_row(row) for row in qs]
+
+
+def _close_frame(symbol: Symbol, start: date | None = None, end: date | None = None, lookback_days: int | None = 90) -> pd.DataFrame:
+    """Date/close frame for backtests, built from raw tuples instead of full history dicts."""
+    start, end = _history_window(start, end, lookback_days)
+    rows = DaySymbol.objects.filter(symbol=symbol, date__gte=start, date__lte=end).order_by("date").values_list("date", "close")
+    df = pd.DataFrame(list(rows), columns=["date", "close"])
+    df["close"] = df["close"].astype(float).round(2)
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def _price_history_bulk(symbols: list[Symbol], lookback_days: int | None = 90) -> dict[int, list[dict[str, Any]]]:
+    """Price history for several symbols with one query, keyed by symbol id."""
+    start, end = _history_window(None, None, lookback_days)
     qs = (
-        DaySymbol.objects.filter(symbol=symbol, date__gte=start, date__lte=end)
-        .order_by("date")
-        .values("date", "open", "high", "low", "close", "volume", "rsi", "macd", "macd_signal", "macd_histogram")
+        DaySymbol.objects.filter(symbol_id__in={sym.id for sym in symbols}, date__gte=start, date__lte=end)
+        .order_by("symbol_id", "date")
+        .values("symbol_id", *HISTORY_FIELDS)
     )
-    return [
-        {
-            "date": row["date"].isoformat(),
-            "open": round(row["open"], 2),
-            "high": round(row["high"], 2),
-            "low": round(row["low"], 2),
-            "close": round(row["close"], 2),
-            "volume": int(row["volume"]),
-            "rsi": round(row["rsi"], 2) if row["rsi"] is not None else None,
-            "macd": round(row["macd"], 4) if row["macd"] is not None else None,
-            "macd_signal": round(row["macd_signal"], 4) if row["macd_signal"] is not None else None,
-            "macd_histogram": round(row["macd_histogram"], 4) if row["macd_histogram"] is not None else None,
-        }
-        for row in qs
-    ]
+    history: dict[int, list[dict[str, Any]]] = {sym.id: [] for sym in symbols}
+    for symbol_id, rows in groupby(qs, key=itemgetter("symbol_id")):
+        history[symbol_id] = [_history_row(row) for row in rows]
+    return history
+
 
+def _recent_history_and_range(symbol: Symbol, lookback_days: int | None = 90) -> tuple[list[dict[str, Any]], tuple[float, float] | None]:
+    """Last two history rows plus the window's (highest, lowest) close, without loading the whole window."""
+    start, end = _history_window(None, None, lookback_days)
+    qs = DaySymbol.objects.filter(symbol=symbol, date__gte=start, date__lte=end)
+    close_range = qs.aggregate(highest=Max("close"), lowest=Min("close"))
+    if close_range["highest"] is None:
+        return [], None
+    recent = [_history_row(row) for row in qs.order_by("-date").values(*HISTORY_FIELDS)[:2]]
+    recent.reverse()
+    return recent, (close_range["highest"], close_range["lowest"])
 
-def _symbol_stats(symbol: Symbol, history: list[dict[str, Any]]) -> dict[str, Any]:
+
+def _symbol_stats(symbol: Symbol, history: list[dict[str, Any]], close_range: tuple[float, float] | None = None) -> dict[str, Any]:
     if not history:
         return {}
 
@@ -77,25 +164,51 @@ def _symbol_stats(symbol: Symbol, history: list[dict[str, Any]]) -> dict[str, An
     prev = history[-2] if len(history) > 1 else latest
     change = latest["close"] - prev["close"]
     change_pct = (change / prev["close"] * 100) if prev["close"] else 0
-    closes = [h["close"] for h in history]
+    if close_range is None:
+        closes = [h["close"] for h in history]
+        close_range = (max(closes), min(closes))
 
     return {
         "latest_close": latest["close"],
         "latest_date": latest["date"],
         "change": round(change, 2),
         "change_percent": round(change_pct, 2),
-        "highest_close": round(max(closes), 2),
-        "lowest_close": round(min(closes), 2),
+        "highest_close": round(close_range[0], 2),
+        "lowest_close": round(close_range[1], 2),
         "trend_angle": round(symbol.thirty_close_trend or 0, 2),
         "signal": symbol.obv_status,
-        "latest_prediction": getattr(symbol.dayprediction_set.order_by("-date").first(), "prediction", None),
+        "latest_prediction": getattr(_latest_prediction(symbol), "prediction", None),
         "accuracy": round(symbol.accuracy, 4) if symbol.accuracy is not None else None,
         "last_volume": int(symbol.last_volume),
     }
 
 
+def _latest_prediction(symbol: Symbol) -> DayPrediction | None:
+    if hasattr(symbol, "latest_predictions"):
+        return symbol.latest_predictions[0] if symbol.latest_predictions else None
+    return symbol.dayprediction_set.order_by("-date").first()
+
+
+def _active_portfolios(user, portfolio_ids: list[int] | None = None) -> list[Portfolio]:
+    """User's active portfolios with their exchange and active holdings loaded in three queries total."""
+    portfolios = Portfolio.objects.filter(user=user, is_active=True)
+    if portfolio_ids:
+        portfolios = portfolios.filter(id__in=portfolio_ids)
+    return list(
+        portfolios.select_related("exchange").prefetch_related(
+            Prefetch(
+                "holdings",
+                queryset=PortfolioHolding.objects.filter(status="ACTIVE").select_related("symbol__exchange"),
+                to_attr="active_holdings",
+            )
+        )
+    )
+
+
 def _portfolio_holdings_snapshot(portfolio: Portfolio) -> list[dict[str, Any]]:
-    holdings = PortfolioHolding.objects.filter(portfolio=portfolio, status="ACTIVE").select_related("symbol", "symbol__exchange")
+    holdings = getattr(portfolio, "active_holdings", None)
+    if holdings is None:
+        holdings = PortfolioHolding.objects.filter(portfolio=portfolio, status="ACTIVE").select_related("symbol", "symbol__exchange")
     snapshot = []
     for holding in holdings:
         symbol = holding.symbol
@@ -202,17 +315,40 @@ def _backtest_ema_crossover(df: pd.DataFrame, fast: int, slow: int, initial_capi
     }
 
 
-def _rule_based_simulation(df: pd.DataFrame, buy_threshold: Decimal, sell_threshold: Decimal, buy_shares: int, bankroll: Decimal) -> dict[str, Any]:
+def _load_closes(symbol: Symbol, lookback_days: int | None = 90) -> list[tuple[date, int]]:
+    """(date, close in whole cents) pairs for the lookback window, as plain tuples rather than dicts."""
+    # Loaded in full: the simulation indexes back into the rows for each trade, and a window is at most 365 days
+    start, end = _history_window(None, None, lookback_days)
+    qs = DaySymbol.objects.filter(symbol=symbol, date__gte=start, date__lte=end).order_by("date").values_list("date", "close")
+    return [(day, round(round(close, 2) * 100)) for day, close in qs]
+
+
+def _cents(value: int) -> Decimal:
+    return Decimal(value).scaleb(-2)
+
+
+def _rule_based_simulation(rows: Sequence[tuple[date, int]], buy_threshold: Decimal, sell_threshold: Decimal, buy_shares: int, bankroll: Decimal) -> dict[str, Any]:
+    if len(rows) < 5:
+        msg = "Not enough historical data to simulate strategy."
+        raise ToolExecutionError(msg)
+
+    # Day-over-day moves in whole cents, compared against the thresholds in one vectorised pass.
+    # Closes only become Decimals on days that trade.
+    cents = np.fromiter((close for _, close in rows), dtype=np.int64, count=len(rows))
+    deltas = np.diff(cents)
+    buy_mask = deltas >= float(buy_threshold * 100)
+    sell_mask = deltas <= -float(sell_threshold * 100)
+
     cash = bankroll
     shares = Decimal("0")
     trades = []
 
-    prev_close = Decimal(str(df.iloc[0]["close"]))
-
-    for _, row in df.iloc[1:].iterrows():
-        current_close = Decimal(str(row["close"]))
-        delta = current_close - prev_close
-        if delta >= buy_threshold:
+    # Only days that crossed a threshold can trade
+    for i in np.flatnonzero(buy_mask | sell_mask):
+        day, close_cents = rows[i + 1]
+        current_close = _cents(close_cents)
+        delta = _cents(close_cents - rows[i][1])
+        if buy_mask[i]:
             cost = current_close * buy_shares
             if cash >= cost:
                 cash -= cost
@@ -222,11 +358,11 @@ def _rule_based_simulation(df: pd.DataFrame, buy_threshold: Decimal, sell_thresh
                         "action": "BUY",
                         "shares": buy_shares,
                         "price": float(current_close),
-                        "date": row["date"].isoformat(),
+                        "date": day.isoformat(),
                         "reason": f"Price rose by ${delta:.2f} (>= ${buy_threshold})",
                     }
                 )
-        elif delta <= -sell_threshold and shares > 0:
+        elif shares > 0:
             proceeds = current_close * shares
             cash += proceeds
             trades.append(
@@ -234,14 +370,13 @@ def _rule_based_simulation(df: pd.DataFrame, buy_threshold: Decimal, sell_thresh
                     "action": "SELL",
                     "shares": float(shares),
                     "price": float(current_close),
-                    "date": row["date"].isoformat(),
+                    "date": day.isoformat(),
                     "reason": f"Price fell by ${delta:.2f} (<= -${sell_threshold})",
                 }
             )
             shares = Decimal("0")
-        prev_close = current_close
 
-    last_price = Decimal(str(df.iloc[-1]["close"]))
+    last_price = _cents(rows[-1][1])
     ending_value = cash + shares * last_price
     pnl = ending_value - bankroll
     return {
@@ -252,152 +387,156 @@ def _rule_based_simulation(df: pd.DataFrame, buy_threshold: Decimal, sell_thresh
         "remaining_shares": float(shares),
         "last_price": float(last_price),
         "trades": trades,
-        "days_evaluated": len(df),
+        "days_evaluated": len(rows),
     }
 
 
-class ChatToolset:
-    def __init__(self, user):
-        self.user = user
-
-    def tool_specs(self) -> list[dict[str, Any]]:
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_symbol_overview",
-                    "description": "Fetch latest performance metrics for a given symbol, optionally including recent price history.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "symbol": {"type": "string", "description": "Ticker symbol, e.g., AAPL"},
-                            "exchange": {"type": "string", "description": "Exchange code such as NASDAQ, NYSE, TSE", "nullable": True},
-                            "include_history": {"type": "boolean", "default": False},
-                            "history_days": {"type": "integer", "default": 30, "minimum": 5, "maximum": 365},
-                        },
-                        "required": ["symbol"],
-                    },
+# Static, so every request sends a byte-identical tools prefix (eligible for OpenAI prompt caching)
+TOOL_SPECS: list[dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_symbol_overview",
+            "description": "Fetch latest performance metrics for a given symbol, optionally including recent price history.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "symbol": {"type": "string", "description": "Ticker symbol, e.g., AAPL"},
+                    "exchange": {"type": "string", "description": "Exchange code such as NASDAQ, NYSE, TSE", "nullable": True},
+                    "include_history": {"type": "boolean", "default": False},
+                    "history_days": {"type": "integer", "default": 30, "minimum": 5, "maximum": 365},
                 },
+                "required": ["symbol"],
             },
-            {
-                "type": "function",
-                "function": {
-                    "name": "compare_symbols",
-                    "description": "Compare multiple symbols side-by-side across key metrics.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "symbols": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "symbol": {"type": "string"},
-                                        "exchange": {"type": "string", "nullable": True},
-                                    },
-                                    "required": ["symbol"],
-                                },
-                                "minItems": 2,
-                                "maxItems": 10,
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "compare_symbols",
+            "description": "Compare multiple symbols side-by-side across key metrics.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "symbols": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "symbol": {"type": "string"},
+                                "exchange": {"type": "string", "nullable": True},
                             },
-                            "include_history": {"type": "boolean", "default": False},
-                            "history_days": {"type": "integer", "default": 30, "minimum": 5, "maximum": 365},
+                            "required": ["symbol"],
                         },
-                        "required": ["symbols"],
+                        "minItems": 2,
+                        "maxItems": 10,
                     },
+                    "include_history": {"type": "boolean", "default": False},
+                    "history_days": {"type": "integer", "default": 30, "minimum": 5, "maximum": 365},
                 },
+                "required": ["symbols"],
             },
-            {
-                "type": "function",
-                "function": {
-                    "name": "portfolio_overview",
-                    "description": "Summarize portfolio holdings, cash, and allocation metrics for the current user.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "portfolio_ids": {
-                                "type": "array",
-                                "items": {"type": "integer"},
-                                "nullable": True,
-                            }
-                        },
-                    },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "portfolio_overview",
+            "description": "Summarize portfolio holdings, cash, and allocation metrics for the current user.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "portfolio_ids": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "nullable": True,
+                    }
                 },
             },
-            {
-                "type": "function",
-                "function": {
-                    "name": "portfolio_scenario_analysis",
-                    "description": "Run scenario analysis by applying percentage changes to specified holdings.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "portfolio_id": {"type": "integer", "nullable": True},
-                            "adjustments": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "symbol": {"type": "string"},
-                                        "exchange": {"type": "string", "nullable": True},
-                                        "pct_change": {"type": "number"},
-                                    },
-                                    "required": ["symbol", "pct_change"],
-                                },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "portfolio_scenario_analysis",
+            "description": "Run scenario analysis by applying percentage changes to specified holdings.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "portfolio_id": {"type": "integer", "nullable": True},
+                    "adjustments": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "symbol": {"type": "string"},
+                                "exchange": {"type": "string", "nullable": True},
+                                "pct_change": {"type": "number"},
                             },
+                            "required": ["symbol", "pct_change"],
                         },
-                        "required": ["adjustments"],
                     },
                 },
+                "required": ["adjustments"],
             },
-            {
-                "type": "function",
-                "function": {
-                    "name": "run_strategy_backtest",
-                    "description": "Backtest a technical strategy (currently EMA crossover) over a date range.",
-                    "parameters": {
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "run_strategy_backtest",
+            "description": "Backtest a technical strategy (currently EMA crossover) over a date range.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "symbol": {"type": "string"},
+                    "exchange": {"type": "string", "nullable": True},
+                    "start_date": {"type": "string", "description": "YYYY-MM-DD"},
+                    "end_date": {"type": "string", "description": "YYYY-MM-DD"},
+                    "initial_capital": {"type": "number", "default": 10000},
+                    "strategy": {
                         "type": "object",
                         "properties": {
-                            "symbol": {"type": "string"},
-                            "exchange": {"type": "string", "nullable": True},
-                            "start_date": {"type": "string", "description": "YYYY-MM-DD"},
-                            "end_date": {"type": "string", "description": "YYYY-MM-DD"},
-                            "initial_capital": {"type": "number", "default": 10000},
-                            "strategy": {
-                                "type": "object",
-                                "properties": {
-                                    "type": {"type": "string", "enum": ["ema_crossover"]},
-                                    "fast_period": {"type": "integer", "default": 20},
-                                    "slow_period": {"type": "integer", "default": 50},
-                                },
-                                "required": ["type"],
-                            },
+                            "type": {"type": "string", "enum": ["ema_crossover"]},
+                            "fast_period": {"type": "integer", "default": 20},
+                            "slow_period": {"type": "integer", "default": 50},
                         },
-                        "required": ["symbol", "start_date", "end_date", "strategy"],
+                        "required": ["type"],
                     },
                 },
+                "required": ["symbol", "start_date", "end_date", "strategy"],
             },
-            {
-                "type": "function",
-                "function": {
-                    "name": "simulate_rule_based_strategy",
-                    "description": "Simulate a rule-based buy/sell strategy using daily close deltas.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "symbol": {"type": "string"},
-                            "exchange": {"type": "string", "nullable": True},
-                            "buy_threshold": {"type": "number", "description": "Dollar increase triggering a buy"},
-                            "sell_threshold": {"type": "number", "description": "Dollar decrease triggering a sell"},
-                            "buy_shares": {"type": "integer"},
-                            "initial_capital": {"type": "number", "default": 1000},
-                            "history_days": {"type": "integer", "default": 90, "minimum": 10, "maximum": 365},
-                        },
-                        "required": ["symbol", "buy_threshold", "sell_threshold", "buy_shares"],
-                    },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "simulate_rule_based_strategy",
+            "description": "Simulate a rule-based buy/sell strategy using daily close deltas.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "symbol": {"type": "string"},
+                    "exchange": {"type": "string", "nullable": True},
+                    "buy_threshold": {"type": "number", "description": "Dollar increase triggering a buy"},
+                    "sell_threshold": {"type": "number", "description": "Dollar decrease triggering a sell"},
+                    "buy_shares": {"type": "integer"},
+                    "initial_capital": {"type": "number", "default": 1000},
+                    "history_days": {"type": "integer", "default": 90, "minimum": 10, "maximum": 365},
                 },
+                "required": ["symbol", "buy_threshold", "sell_threshold", "buy_shares"],
             },
-        ]
+        },
+    },
+]
+
+
+class ChatToolset:
+    def __init__(self, user):
+        self.user = user
+
+    def tool_specs(self) -> list[dict[str, Any]]:
+        return TOOL_SPECS
 
     def execute(self, name: str, arguments: dict[str, Any]) -> dict[str, Any]:
         if name == "get_symbol_overview":
@@ -419,8 +558,13 @@ class ChatToolset:
 
     def _symbol_overview(self, symbol: str, exchange: str | None = None, include_history: bool = False, history_days: int = 30) -> dict[str, Any]:
         sym, warnings = _resolve_symbol(symbol, exchange)
-        history = _price_history(sym, lookback_days=history_days)
-        stats = _symbol_stats(sym, history)
+        if include_history:
+            history = _price_history(sym, lookback_days=history_days)
+            stats = _symbol_stats(sym, history)
+        else:
+            # Stats only need the last two rows and the close range, which the database computes
+            history, close_range = _recent_history_and_range(sym, lookback_days=history_days)
+            stats = _symbol_stats(sym, history, close_range)
         payload = {
             "symbol": sym.symbol,
             "exchange": sym.exchange.code,
@@ -438,12 +582,10 @@ class ChatToolset:
 
     def _compare_symbols(self, symbols: list[dict[str, Any]], include_history: bool = False, history_days: int = 30) -> dict[str, Any]:
         results = []
-        warnings: list[str] = []
-        for entry in symbols:
-            sym_code = entry.get("symbol")
-            exchange = entry.get("exchange")
-            sym, warning = _resolve_symbol(sym_code, exchange)
-            history = _price_history(sym, lookback_days=history_days)
+        resolved, warnings = _resolve_symbols(symbols)
+        histories = _price_history_bulk(resolved, lookback_days=history_days)
+        for sym in resolved:
+            history = histories[sym.id]
             stats = _symbol_stats(sym, history)
             results.append(
                 {
@@ -454,17 +596,12 @@ class ChatToolset:
                     "history": history if include_history else [],
                 }
             )
-            warnings.extend(warning)
 
         return {"type": "symbol_comparison", "data": {"symbols": results}, "warnings": warnings}
 
     def _portfolio_overview(self, portfolio_ids: list[int] | None = None) -> dict[str, Any]:
-        portfolios = Portfolio.objects.filter(user=self.user, is_active=True)
-        if portfolio_ids:
-            portfolios = portfolios.filter(id__in=portfolio_ids)
-
         data = []
-        for portfolio in portfolios:
+        for portfolio in _active_portfolios(self.user, portfolio_ids):
             holdings = _portfolio_holdings_snapshot(portfolio)
             sector_breakdown = _portfolio_sector_breakdown(holdings)
             data.append(
@@ -473,7 +610,8 @@ class ChatToolset:
                     "name": portfolio.name,
                     "exchange": portfolio.exchange.code,
                     "cash_balance": float(portfolio.cash_balance),
-                    "current_value": float(portfolio.current_value()),
+                    # Cash plus the snapshot's market values; current_value() would re-query every holding
+                    "current_value": float(portfolio.cash_balance) + sum(h["market_value"] for h in holdings),
                     "holdings": holdings,
                     "sector_breakdown": sector_breakdown,
                 }
@@ -481,10 +619,8 @@ class ChatToolset:
         return {"type": "portfolio_overview", "data": {"portfolios": data}, "warnings": []}
 
     def _portfolio_scenario(self, adjustments: list[dict[str, Any]], portfolio_id: int | None = None) -> dict[str, Any]:
-        portfolios = Portfolio.objects.filter(user=self.user, is_active=True)
-        if portfolio_id:
-            portfolios = portfolios.filter(id=portfolio_id)
-        if not portfolios.exists():
+        portfolios = _active_portfolios(self.user, [portfolio_id] if portfolio_id else None)
+        if not portfolios:
             msg = "No portfolios found for scenario analysis."
             raise ToolExecutionError(msg)
 
@@ -517,14 +653,11 @@ class ChatToolset:
             msg = "start_date and end_date must be in YYYY-MM-DD format"
             raise ToolExecutionError(msg) from exc
 
-        history = _price_history(sym, start=start, end=end)
-        if not history:
+        df = _close_frame(sym, start=start, end=end)
+        if df.empty:
             msg = "No price data available for the selected period."
             raise ToolExecutionError(msg)
 
-        df = pd.DataFrame(history)
-        df["date"] = pd.to_datetime(df["date"])
-
         strategy_type = strategy.get("type")
         if strategy_type == "ema_crossover":
             fast = strategy.get("fast_period", 20)
@@ -538,15 +671,8 @@ class ChatToolset:
 
     def _simulate_rule_strategy(self, symbol: str, buy_threshold: float, sell_threshold: float, buy_shares: int, exchange: str | None = None, initial_capital: float = 1000, history_days: int = 90) -> dict[str, Any]:
         sym, warnings = _resolve_symbol(symbol, exchange)
-        history = _price_history(sym, lookback_days=history_days)
-        if len(history) < 5:
-            msg = "Not enough historical data to simulate strategy."
-            raise ToolExecutionError(msg)
-
-        df = pd.DataFrame(history)
-        df["date"] = pd.to_datetime(df["date"])
         result = _rule_based_simulation(
-            df,
+            _load_closes(sym, lookback_days=history_days),
             Decimal(str(buy_threshold)),
             Decimal(str(sell_threshold)),
             buy_shares,
@@ -0,0 +1,60 @@
+"""
+Management command that runs the root-level diagnostic scripts in one process.
+
+Each script boots Django on its own when run directly; running them through this
+command pays the setup cost once and shares the same database connection.
+
+Usage:
+    python manage.py diagnose --portfolio-id 15
+    python manage.py diagnose --portfolio-id 15 --sell-cash --fix-cash
+    python manage.py diagnose --portfolio-id 15 --fix-cash --apply
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Run portfolio diagnostics (holdings, SELL cash handling, cash balance) in a single process"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--portfolio-id", type=int, default=15, help="Portfolio ID to diagnose (default: 15)")
+        parser.add_argument(
+            "--sell-cash",
+            action="store_true",
+            help="Also check cash handling of recent IB SELL orders",
+        )
+        parser.add_argument(
+            "--fix-cash",
+            action="store_true",
+            help="Also recalculate the portfolio cash balance from its transactions",
+        )
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="With --fix-cash, write the recalculated balance (default is a dry run)",
+        )
+
+    def handle(self, *args, **options):
+        # The diagnostic scripts live at the project root, next to manage.py
+        try:
+            import diagnose_holding_issues
+            import diagnose_sell_cash
+            import fix_cash_discrepancy
+        except ImportError as exc:
+            msg = f"Diagnostic scripts not importable, run from the project root: {exc}"
+            raise CommandError(msg) from exc
+
+        portfolio_id = options["portfolio_id"]
+
+        diagnose_holding_issues.diagnose_portfolio(portfolio_id)
+
+        if options["sell_cash"]:
+            diagnose_sell_cash.check_recent_sell_orders()
+            diagnose_sell_cash.check_cash_balance_changes()
+
+        if options["fix_cash"]:
+            fix_cash_discrepancy.fix_portfolio_cash(portfolio_id, dry_run=not options["apply"])
+        elif options["apply"]:
+            self.stdout.write(self.style.WARNING("--apply has no effect without --fix-cash"))
+
+        self.stdout.write(self.style.SUCCESS("Diagnosis complete"))
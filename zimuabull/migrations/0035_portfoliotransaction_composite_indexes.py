@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0034_rename_zimuabull_m_index__d95418_idx_zimuabull_m_index_i_2e4466_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="portfoliotransaction",
+            index=models.Index(
+                fields=["portfolio", "transaction_date", "created_at"], name="zimuabull_p_portfol_4b8eaf_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="portfoliotransaction",
+            index=models.Index(
+                fields=["portfolio", "transaction_type", "-created_at"], name="zimuabull_p_portfol_493563_idx"
+            ),
+        ),
+    ]
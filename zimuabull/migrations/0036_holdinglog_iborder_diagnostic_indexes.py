@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0035_portfoliotransaction_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="portfolioholdinglog",
+            index=models.Index(fields=["portfolio", "operation"], name="zimuabull_p_portfol_2cf0fd_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="portfolioholdinglog",
+            index=models.Index(fields=["portfolio", "symbol", "created_at"], name="zimuabull_p_portfol_744530_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="iborder",
+            index=models.Index(fields=["action", "status", "-filled_at"], name="zimuabull_i_action_36926f_idx"),
+        ),
+    ]
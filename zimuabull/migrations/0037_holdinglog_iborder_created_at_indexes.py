@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0036_holdinglog_iborder_diagnostic_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="portfolioholdinglog",
+            index=models.Index(fields=["-created_at"], name="zimuabull_p_created_6ef4a5_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="iborder",
+            index=models.Index(fields=["-created_at"], name="zimuabull_i_created_006666_idx"),
+        ),
+    ]
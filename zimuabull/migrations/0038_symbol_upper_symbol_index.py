@@ -0,0 +1,16 @@
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0037_holdinglog_iborder_created_at_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="symbol",
+            index=models.Index(django.db.models.functions.text.Upper("symbol"), name="zimuabull_symbol_upper_idx"),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0038_symbol_upper_symbol_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dayprediction",
+            index=models.Index(fields=["symbol", "-date"], name="zimuabull_d_symbol__993f01_idx"),
+        ),
+    ]
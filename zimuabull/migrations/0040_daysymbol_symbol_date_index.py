@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0039_dayprediction_symbol_date_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="daysymbol",
+            index=models.Index(fields=["symbol", "date"], name="zimuabull_d_symbol__582c41_idx"),
+        ),
+    ]
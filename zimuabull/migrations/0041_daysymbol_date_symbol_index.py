@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0040_daysymbol_symbol_date_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="daysymbol",
+            index=models.Index(fields=["-date", "symbol"], name="zimuabull_d_date_fa9b14_idx"),
+        ),
+    ]
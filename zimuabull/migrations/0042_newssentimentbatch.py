@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zimuabull", "0041_daysymbol_date_symbol_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NewsSentimentBatch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("batch_id", models.CharField(max_length=100, unique=True)),
+                ("model_name", models.CharField(max_length=50)),
+                ("news_ids", models.JSONField(default=list)),
+                ("status", models.CharField(default="validating", max_length=20)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
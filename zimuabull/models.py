@@ -1,5 +1,7 @@
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 
 class DaySymbolChoice(models.TextChoices):
@@ -72,6 +74,12 @@ class Symbol(models.Model):
 
     unique_together = ("symbol", "exchange")
 
+    class Meta:
+        indexes = [
+            # Case-insensitive ticker lookups (symbol__iexact, Upper("symbol")__in) from the chat tools
+            models.Index(Upper("symbol"), name="zimuabull_symbol_upper_idx"),
+        ]
+
     def update_trading_signal(self):
         """
         Calculate and update the trading signal (obv_status) for this symbol
@@ -130,6 +138,13 @@ class DaySymbol(models.Model):
 
     unique_together = ("symbol", "date")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["symbol", "date"]),
+            # Admin changelist pages newest trading days first
+            models.Index(fields=["-date", "symbol"]),
+        ]
+
     @staticmethod
     def calculate_rsi(symbol, date, period=14):
         """
@@ -276,6 +291,11 @@ class DayPrediction(models.Model):
 
     unique_together = ("symbol", "date")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["symbol", "-date"]),
+        ]
+
 
 class Favorite(models.Model):
     symbol = models.ForeignKey(Symbol, on_delete=models.CASCADE)
@@ -487,6 +507,8 @@ class PortfolioTransaction(models.Model):
         indexes = [
             models.Index(fields=["portfolio", "-transaction_date"]),
             models.Index(fields=["symbol", "-transaction_date"]),
+            models.Index(fields=["portfolio", "transaction_date", "created_at"]),
+            models.Index(fields=["portfolio", "transaction_type", "-created_at"]),
         ]
 
     def total_amount(self):
@@ -509,29 +531,33 @@ class PortfolioTransaction(models.Model):
         if is_new:
             if self.transaction_type == "BUY":
                 # Deduct cash for buy
-                amount = self.quantity * self.price
-                self.portfolio.cash_balance -= amount
-                self.portfolio.save(update_fields=["cash_balance", "updated_at"])
+                self._adjust_cash(-(self.quantity * self.price))
                 # Update or create holding
                 self._update_holding_for_buy()
 
             elif self.transaction_type == "SELL":
                 # Add cash for sell
-                amount = self.quantity * self.price
-                self.portfolio.cash_balance += amount
-                self.portfolio.save(update_fields=["cash_balance", "updated_at"])
+                self._adjust_cash(self.quantity * self.price)
                 # Update holding
                 self._update_holding_for_sell()
 
             elif self.transaction_type == "DEPOSIT":
                 # Add cash to portfolio
-                self.portfolio.cash_balance += self.amount
-                self.portfolio.save(update_fields=["cash_balance", "updated_at"])
+                self._adjust_cash(self.amount)
 
             elif self.transaction_type == "WITHDRAWAL":
                 # Remove cash from portfolio
-                self.portfolio.cash_balance -= self.amount
-                self.portfolio.save(update_fields=["cash_balance", "updated_at"])
+                self._adjust_cash(-self.amount)
+
+    def _adjust_cash(self, delta):
+        """Apply a cash delta to the portfolio atomically in the database"""
+        # F() avoids lost updates when transactions for the same portfolio are saved concurrently
+        Portfolio.objects.filter(pk=self.portfolio_id).update(
+            cash_balance=models.F("cash_balance") + delta,
+            updated_at=timezone.now()
+        )
+        # Reload rather than add in memory, so a later portfolio.save() cannot write back a stale balance
+        self.portfolio.refresh_from_db(fields=["cash_balance", "updated_at"])
 
     def _update_holding_for_buy(self):
         """Update or create holding after a buy transaction"""
@@ -786,6 +812,9 @@ class PortfolioHoldingLog(models.Model):
             models.Index(fields=["symbol", "-created_at"]),
             models.Index(fields=["transaction"]),
             models.Index(fields=["operation", "-created_at"]),
+            models.Index(fields=["portfolio", "operation"]),
+            models.Index(fields=["portfolio", "symbol", "created_at"]),
+            models.Index(fields=["-created_at"]),
         ]
 
 
@@ -1291,6 +1320,8 @@ class IBOrder(models.Model):
             models.Index(fields=["status", "-created_at"]),
             models.Index(fields=["ib_order_id"]),
             models.Index(fields=["day_trade_position"]),
+            models.Index(fields=["action", "status", "-filled_at"]),
+            models.Index(fields=["-created_at"]),
         ]
 
     def __str__(self):
@@ -1389,3 +1420,24 @@ class NewsSentiment(models.Model):
 
     def __str__(self):
         return f"{self.news.title[:40]} - Sentiment: {self.sentiment_score}/10"
+
+
+class NewsSentimentBatch(models.Model):
+    """
+    OpenAI Batch API job scoring news sentiment offline (half the price of
+    synchronous completions). Open while completed_at is null; the articles in
+    news_ids are skipped by new submissions until then.
+    """
+    batch_id = models.CharField(max_length=100, unique=True)
+    model_name = models.CharField(max_length=50)
+    news_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, default="validating")  # Last OpenAI batch status seen
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.batch_id} - {self.status} ({len(self.news_ids)} articles)"
@@ -8,9 +8,10 @@ import os
 from datetime import datetime, timezone
 
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
 
-from zimuabull.models import News, NewsSentiment
+from zimuabull.models import News, NewsSentiment, NewsSentimentBatch
 
 logger = logging.getLogger(__name__)
 
@@ -85,8 +86,11 @@ Please analyze the sentiment of this news article from a stock market investor's
     return prompt
 
 
-def call_openai(model: str, system_prompt: str, user_prompt: str):
-    """Call OpenAI API to get sentiment analysis."""
+# Batch API statuses after which a batch will not change again
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def get_openai_client():
     if not OpenAI:
         raise RuntimeError("OpenAI client not available. Install 'openai' package.")
 
@@ -94,18 +98,27 @@ def call_openai(model: str, system_prompt: str, user_prompt: str):
     if not api_key:
         raise RuntimeError("Missing OPENAI_API_KEY environment variable.")
 
-    client = OpenAI(api_key=api_key)
+    return OpenAI(api_key=api_key)
+
 
+def build_completion_request(model: str, system_prompt: str, user_prompt: str):
+    """Chat completion parameters, shared by direct calls and Batch API request lines."""
     # Use standard chat completions API with JSON mode
-    chat = client.chat.completions.create(
-        model=model,
-        messages=[
+    return {
+        "model": model,
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        response_format={"type": "json_object"},
-        temperature=0.2,
-    )
+        "response_format": {"type": "json_object"},
+        "temperature": 0.2,
+    }
+
+
+def call_openai(model: str, system_prompt: str, user_prompt: str):
+    """Call OpenAI API to get sentiment analysis."""
+    client = get_openai_client()
+    chat = client.chat.completions.create(**build_completion_request(model, system_prompt, user_prompt))
     return chat.choices[0].message.content
 
 
@@ -160,6 +173,9 @@ def analyze_news_sentiment(news_id=None, model_name="gpt-4o-mini"):
             logger.error(f"News ID {news_id} not found")
             return
 
+    elif settings.NEWS_SENTIMENT_USE_BATCH:
+        submit_news_sentiment_batch(model_name)
+
     else:
         # Analyze all news without sentiment
         news_without_sentiment = News.objects.filter(sentiment__isnull=True)
@@ -214,6 +230,145 @@ def _analyze_single_news(news_item, model_name):
     )
 
 
+def submit_news_sentiment_batch(model_name):
+    """
+    Queue every article without sentiment (and not already in an open batch)
+    as one OpenAI Batch API job. Results are stored by collect_news_sentiment_batches.
+    """
+    in_flight = {
+        news_id
+        for news_ids in NewsSentimentBatch.objects.filter(completed_at__isnull=True).values_list("news_ids", flat=True)
+        for news_id in news_ids
+    }
+    news_items = list(News.objects.filter(sentiment__isnull=True).exclude(id__in=in_flight))
+
+    if not news_items:
+        logger.info("No news articles need sentiment analysis")
+        return None
+
+    lines = [
+        json.dumps({
+            "custom_id": f"news-{news_item.id}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": build_completion_request(model_name, SYSTEM_PROMPT, build_user_prompt(news_item)),
+        })
+        for news_item in news_items
+    ]
+
+    client = get_openai_client()
+    input_file = client.files.create(file=("news_sentiment.jsonl", "\n".join(lines).encode()), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+    record = NewsSentimentBatch.objects.create(
+        batch_id=batch.id,
+        model_name=model_name,
+        news_ids=[news_item.id for news_item in news_items],
+        status=batch.status,
+    )
+    logger.info(f"Submitted sentiment batch {batch.id} for {len(news_items)} news articles")
+    return record
+
+
+SENTIMENT_KEYS = ("sentiment", "justification", "description")
+
+
+def _parse_batch_line(line):
+    """(news_id, sentiment data) for one batch output line, or None (with a warning) if it is unusable."""
+    try:
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            logger.warning(f"Sentiment batch request {item.get('custom_id')} failed: {item.get('error')}")
+            return None
+        news_id = int(item["custom_id"].removeprefix("news-"))
+        sentiment_data = parse_sentiment_response(response["body"]["choices"][0]["message"]["content"])
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as exc:
+        logger.warning(f"Skipping malformed sentiment batch line: {exc!r}")
+        return None
+
+    # parse_sentiment_response can return a partial dict when it salvages JSON from surrounding text
+    if not isinstance(sentiment_data, dict) or not all(k in sentiment_data for k in SENTIMENT_KEYS):
+        logger.warning(f"Skipping sentiment batch result for news {news_id}: missing required keys")
+        return None
+    return news_id, sentiment_data
+
+
+def _store_batch_results(output, model_name):
+    """Save sentiment from a batch output file (JSONL, one response per line). Returns the number stored."""
+    results = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        parsed = _parse_batch_line(line)
+        if parsed is not None:
+            news_id, sentiment_data = parsed
+            results[news_id] = sentiment_data
+
+    # Articles may have been deleted while the batch ran
+    existing_ids = set(News.objects.filter(id__in=list(results)).values_list("id", flat=True))
+
+    with transaction.atomic():
+        for news_id in existing_ids:
+            sentiment_data = results[news_id]
+            NewsSentiment.objects.update_or_create(
+                news_id=news_id,
+                defaults={
+                    "sentiment_score": sentiment_data["sentiment"],
+                    "justification": sentiment_data["justification"],
+                    "description": sentiment_data["description"],
+                    "model_name": model_name,
+                }
+            )
+
+    return len(existing_ids)
+
+
+@shared_task
+def collect_news_sentiment_batches():
+    """
+    Poll open sentiment batches and store the results of finished ones.
+
+    Scheduled by Celery Beat. Once a batch reaches a terminal status it is
+    closed, so any articles it did not score are picked up by the next submission.
+    A batch whose results cannot be stored is closed as failed rather than
+    retried on every run; one that cannot be polled is retried next run.
+    """
+    open_batches = list(NewsSentimentBatch.objects.filter(completed_at__isnull=True))
+    if not open_batches:
+        return
+
+    client = get_openai_client()
+
+    for record in open_batches:
+        try:
+            batch = client.batches.retrieve(record.batch_id)
+        except Exception:
+            logger.exception(f"Could not poll sentiment batch {record.batch_id}")
+            continue
+        record.status = batch.status
+
+        if batch.status in BATCH_TERMINAL_STATUSES:
+            stored = 0
+            if batch.output_file_id:
+                try:
+                    stored = _store_batch_results(client.files.content(batch.output_file_id).text, record.model_name)
+                except Exception:
+                    logger.exception(f"Could not store results of sentiment batch {record.batch_id}")
+                    record.status = "failed"
+            record.completed_at = datetime.now(timezone.utc)
+            logger.info(
+                f"Sentiment batch {record.batch_id} {batch.status}: "
+                f"{stored}/{len(record.news_ids)} articles scored"
+            )
+
+        record.save(update_fields=["status", "completed_at"])
+
+
 @shared_task
 def fetch_and_analyze_news_for_symbol(symbol_id, model_name="gpt-4o-mini"):
     """
@@ -1,16 +1,25 @@
+from datetime import date
 from decimal import Decimal
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.utils import timezone
 
+from asgiref.sync import async_to_sync
+
+from zimuabull.chat.orchestrator import ChatOrchestrator
+from zimuabull.chat.tools import ChatToolset, ToolExecutionError, _rule_based_simulation
 from zimuabull.daytrading.trading_engine import (
     Recommendation,
     close_all_positions,
     execute_recommendations,
 )
 from zimuabull.models import (
+    Conversation,
+    ConversationMessage,
     DayTradePosition,
     DayTradePositionStatus,
     Exchange,
@@ -99,3 +108,128 @@ class TradingEngineTests(TestCase):
 
         assert DayTradePosition.objects.filter(portfolio=self.portfolio).count() == 1
         assert Portfolio.objects.get(id=self.portfolio.id).cash_balance == cash_after_first
+
+
+def _chunk(content=None, tool_calls=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+
+
+def _reply_chunks(**_kwargs):
+    return iter([_chunk("AAPL is up 2% today.")])
+
+
+async def _stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+chat_settings = override_settings(
+    OPENAI_API_KEY="test-key",
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "chat": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "chat-tests"},
+    },
+)
+
+
+@chat_settings
+class ChatReplyCacheTests(TestCase):
+    question = "What is AAPL doing?"
+
+    def setUp(self):
+        caches["chat"].clear()
+        self.user = get_user_model().objects.create_user(username="chatter", password="pass")
+        self.conversation = Conversation.objects.create(user=self.user, title="AAPL")
+        self.orchestrator = ChatOrchestrator()
+        self.mock_create = MagicMock(side_effect=_reply_chunks)
+
+    def _ask(self):
+        message = ConversationMessage.objects.create(conversation=self.conversation, role="user", content=self.question)
+        with patch.object(self.orchestrator.client.chat.completions, "create", self.mock_create):
+            return self.orchestrator.run(self.user, self.conversation, self.question, user_message_id=message.id)
+
+    def test_repeat_without_new_reply_is_served_from_cache(self):
+        first = self._ask()
+        # The first reply was never saved (e.g. the stream dropped), so the retry can reuse it
+        second = self._ask()
+
+        assert self.mock_create.call_count == 1
+        assert second["reply"] == first["reply"]
+
+    def test_new_turn_in_between_misses_the_cache(self):
+        first = self._ask()
+        ConversationMessage.objects.create(conversation=self.conversation, role="assistant", content=first["reply"])
+        self._ask()
+
+        assert self.mock_create.call_count == 2
+
+
+@chat_settings
+class ChatStreamTests(TestCase):
+    question = "What is AAPL doing?"
+
+    def setUp(self):
+        caches["chat"].clear()
+        self.user = get_user_model().objects.create_user(username="streamer", password="pass")
+        self.conversation = Conversation.objects.create(user=self.user, title="AAPL")
+        self.orchestrator = ChatOrchestrator()
+
+    def test_text_streamed_in_a_tool_turn_is_retracted(self):
+        tool_call = SimpleNamespace(
+            index=0,
+            id="call_1",
+            type="function",
+            function=SimpleNamespace(name="get_symbol_overview", arguments='{"symbol": "AAPL"}'),
+        )
+        mock_create = AsyncMock(
+            side_effect=[
+                _stream(_chunk("Looking. "), _chunk(tool_calls=[tool_call])),
+                _stream(_chunk("Done")),
+            ]
+        )
+        message = ConversationMessage.objects.create(conversation=self.conversation, role="user", content=self.question)
+
+        async def collect():
+            return [
+                event
+                async for event in self.orchestrator.arun(
+                    self.user, self.conversation, self.question, user_message_id=message.id
+                )
+            ]
+
+        with (
+            patch.object(self.orchestrator.async_client.chat.completions, "create", mock_create),
+            patch.object(ChatToolset, "execute", side_effect=ToolExecutionError("no data")),
+        ):
+            events = async_to_sync(collect)()
+
+        # What a client displays: the tokens received since the last reset
+        shown = ""
+        for kind, payload in events:
+            if kind == "reset":
+                shown = ""
+            elif kind == "token":
+                shown += payload
+
+        assert [kind for kind, _ in events] == ["token", "reset", "status", "token", "final"]
+        assert shown == events[-1][1]["reply"] == "Done"
+
+
+class RuleBasedSimulationTests(SimpleTestCase):
+    def test_trades_report_cent_prices_and_plain_iso_dates(self):
+        # Closes in whole cents: a $2.00 rise on Jan 3 buys, a $3.00 fall on Jan 5 sells
+        closes = [10000, 10000, 10200, 10200, 9900, 9900]
+        rows = [(date(2024, 1, day), close) for day, close in enumerate(closes, start=1)]
+
+        result = _rule_based_simulation(rows, Decimal("1.5"), Decimal("1.5"), 1, Decimal("1000"))
+
+        assert [(t["action"], t["date"], t["price"], t["shares"]) for t in result["trades"]] == [
+            ("BUY", "2024-01-03", 102.0, 1),
+            ("SELL", "2024-01-05", 99.0, 1.0),
+        ]
+        assert result["ending_value"] == 997.0
+        assert result["pnl"] == -3.0
+        assert result["remaining_shares"] == 0.0
+        assert result["last_price"] == 99.0
+        assert result["days_evaluated"] == 6
@@ -1122,7 +1122,7 @@ class ChatWithLLM(APIView):
             )
 
         # Save user message
-        ConversationMessage.objects.create(
+        user_message = ConversationMessage.objects.create(
             conversation=conversation,
             role="user",
             content=message,
@@ -1158,7 +1158,9 @@ class ChatWithLLM(APIView):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
 
-        agent_output = orchestrator.run(request.user, conversation, message, context_params)
+        agent_output = orchestrator.run(
+            request.user, conversation, message, context_params, user_message_id=user_message.id
+        )
 
         reply = agent_output.get("reply", "I could not generate a response.")
         analysis = agent_output.get("analysis", {})
@@ -1278,7 +1280,8 @@ async def chat_stream(request):
             title=message[:100]
         )
 
-    await sync_to_async(ConversationMessage.objects.create)(
+    # Saved before streaming so the question survives a disconnect or a failed run
+    user_message = await sync_to_async(ConversationMessage.objects.create)(
         conversation=conversation,
         role="user",
         content=message,
@@ -1290,7 +1293,7 @@ async def chat_stream(request):
     except RuntimeError as exc:
         return JsonResponse({"error": str(exc)}, status=503)
 
-    return sse_response(orchestrator, request.user, conversation, message, context)
+    return sse_response(orchestrator, request.user, conversation, message, context, user_message_id=user_message.id)
 
 
 class ConversationList(APIView):